@@ -0,0 +1,174 @@
+from __future__ import annotations
+import argparse
+import gc
+import json
+import sys
+import tempfile
+import time
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic import generate_trips, write_template, write_workbook  # noqa: E402
+
+# Settlement pipeline benchmark on synthetic workbooks:
+#   python benchmarks/bench_pipeline.py --sizes 1000,10000,100000 --json bench.json
+# Each stage is timed separately (best of --repeat) and reported as trip-days/sec,
+# trip-days being the (trip, country, day) rows the export writes.
+
+STAGES = ["load_trips", "segment", "segment_batch", "per_diem", "per_diem_batch", "export", "pipeline", "pdf"]
+PDF_SCRIPT = ROOT / "python3 -m pip install pymupdf"
+SHEET = "September 2025"
+
+
+def _best(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _pdf_module():
+    # the accountant export lives in a script without a .py suffix
+    loader = SourceFileLoader("pdf_accountant", str(PDF_SCRIPT))
+    mod = module_from_spec(spec_from_loader(loader.name, loader))
+    loader.exec_module(mod)
+    return mod
+
+
+def run_size(n: int, stages: List[str], repeat: int, pdf_max: int, workdir: Path) -> List[Dict]:
+    from compute_trip_segments import iter_country_days, split_trip_into_country_segments
+    from export_all import export
+    from import_excel import load_trips
+    from per_diem import FOREIGN_RESULT_CACHE, compute_foreign_per_diem_for_day
+    from rates_bundle import load_rates_bundle
+    from sk_per_diem import SK_RESULT_CACHE, compute_sk_per_diem_for_day
+
+    rates = load_rates_bundle(ROOT / "rates.yml")
+    trips = generate_trips(n)
+    xlsx = write_workbook(workdir / f"trips_{n}.xlsx", trips)
+
+    days = [
+        (c, d, h)
+        for t in trips
+        for c, d, h in iter_country_days(split_trip_into_country_segments(t))
+        if h > 0
+    ]
+    n_days = len(days)
+
+    def segment():
+        for t in trips:
+            for _ in iter_country_days(split_trip_into_country_segments(t)):
+                pass
+
+    def segment_batch():
+        from trip_segments_batch import expand_trips_to_days
+
+        expand_trips_to_days(trips_frame)
+
+    def per_diem():
+        FOREIGN_RESULT_CACHE.clear()
+        SK_RESULT_CACHE.clear()
+        for c, d, h in days:
+            if c == "SK":
+                compute_sk_per_diem_for_day(rates.sk_schedules, d, h)
+            else:
+                compute_foreign_per_diem_for_day(rates, c, d, h)
+
+    def per_diem_batch():
+        from per_diem_batch import compute_per_diem_batch
+
+        compute_per_diem_batch(rates, [x[0] for x in days], [x[1] for x in days], [x[2] for x in days])
+
+    def pipeline():
+        # read + price + XLSX write from the workbook, stages overlapping (pipeline.py)
+        from export_writers import RowWriters
+        from pipeline import RowsSink, run_pipeline
+
+        with RowWriters(xlsx=str(workdir / "out_pipeline.xlsx")) as w:
+            run_pipeline([(str(xlsx), [SHEET], False)], rates, [RowsSink(w)])
+
+    def pdf():
+        mod = _pdf_module()
+        out = mod.render_all(template, trips[:pdf_max], rates)
+        out.save(str(workdir / "out.pdf"))
+        out.close()
+
+    trips_frame = None
+    if "segment_batch" in stages:
+        import pandas as pd
+
+        trips_frame = pd.DataFrame(trips)
+
+    template = None
+    if "pdf" in stages:
+        template = write_template(workdir / "template.pdf")
+
+    runs = {
+        "load_trips": lambda: load_trips(str(xlsx), SHEET),
+        "segment": segment,
+        "segment_batch": segment_batch,
+        "per_diem": per_diem,
+        "per_diem_batch": per_diem_batch,
+        "export": lambda: export(trips, rates, out=str(workdir / "out.xlsx")),
+        "pipeline": pipeline,
+        "pdf": pdf,
+    }
+
+    results = []
+    for stage in stages:
+        stage_trips = min(n, pdf_max) if stage == "pdf" else n
+        stage_days = n_days if stage_trips == n else sum(
+            1 for t in trips[:stage_trips]
+            for _, _, h in iter_country_days(split_trip_into_country_segments(t)) if h > 0
+        )
+        seconds = _best(runs[stage], repeat)
+        results.append({
+            "trips": stage_trips,
+            "trip_days": stage_days,
+            "stage": stage,
+            "seconds": round(seconds, 4),
+            "trip_days_per_sec": round(stage_days / seconds, 1) if seconds else None,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark stravného na syntetických dátach")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="počty ciest, oddelené čiarkou")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"z {', '.join(STAGES)}")
+    parser.add_argument("--repeat", type=int, default=1, help="najlepší z N behov")
+    # rendering time grows faster than linearly with the page count (1k trips ~6 s, 10k ~330 s)
+    parser.add_argument("--pdf-max", type=int, default=1_000, help="max ciest pre PDF (2 strany na cestu)")
+    parser.add_argument("--json", default=None, help="výsledky aj do JSON súboru")
+    args = parser.parse_args(argv)
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+
+    results = []
+    print(f"{'trips':>8} {'trip-days':>10} {'stage':<15} {'seconds':>9} {'trip-days/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(x) for x in args.sizes.split(",")):
+            for r in run_size(n, stages, args.repeat, args.pdf_max, Path(tmp)):
+                results.append(r)
+                print(f"{r['trips']:>8} {r['trip_days']:>10} {r['stage']:<15} {r['seconds']:>9.3f} "
+                      f"{r['trip_days_per_sec']:>12,.0f}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2),
+                                   encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
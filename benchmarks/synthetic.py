@@ -0,0 +1,126 @@
+from __future__ import annotations
+import random
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+# Synthetic trips shaped like the real "Sluzobne cesty.xlsx" sheets: mostly short
+# domestic trips, foreign trips with border_out/border_in, and multi-day
+# SK -> A -> B -> SK itineraries written to the "prechody hranic" column.
+
+FOREIGN = ["CZ", "AT", "DE", "PL", "UK"]
+FOREIGN_WEIGHTS = [30, 30, 20, 12, 8]
+PURPOSES = ["Servis", "Montáž", "Školenie", "Audit", "Obhliadka", "Ground"]
+
+HEADER = ["datum", "miesto", "odchod", "prechod hranice tam", "navrat",
+          "prechod hranice spat", "prichod", "dovod", "country", "prechody hranic"]
+
+
+def _minute(dt: datetime) -> datetime:
+    return dt.replace(second=0, microsecond=0)
+
+
+def generate_trips(n: int, seed: int = 2025, year: int = 2025) -> List[Dict]:
+    """
+    n trip dicts in the load_trips() layout (plus "miesto"), sorted by start.
+    ~45 % domestic, ~40 % single foreign country, ~15 % multi-country.
+    """
+    rnd = random.Random(seed)
+    first = datetime(year, 1, 2)
+    trips = []
+    for _ in range(n):
+        start = first + timedelta(days=rnd.randrange(360), hours=rnd.randint(4, 10), minutes=rnd.choice([0, 15, 30, 45]))
+        kind = rnd.random()
+        trip = {
+            "country": "SK",
+            "start_dt": start,
+            "end_dt": start,
+            "purpose": rnd.choice(PURPOSES),
+            "border_out": None,
+            "border_in": None,
+            "crossings": None,
+            "miesto": "",
+        }
+
+        if kind < 0.45:
+            end = start + timedelta(hours=rnd.choice([3, 5, 7, 9, 11, 13]), minutes=rnd.choice([0, 20, 40]))
+            trip.update(end_dt=end, miesto=rnd.choice(["BA", "TT", "ZA", "KE"]))
+        elif kind < 0.85:
+            country = rnd.choices(FOREIGN, FOREIGN_WEIGHTS)[0]
+            end = start + timedelta(hours=rnd.choice([10, 14, 20, 30, 54, 80]), minutes=rnd.choice([0, 30]))
+            b_out = _minute(start + timedelta(minutes=rnd.randint(30, 150)))
+            b_in = _minute(end - timedelta(minutes=rnd.randint(30, 150)))
+            trip.update(country=country, end_dt=end, miesto=country)
+            if b_in - b_out < timedelta(days=1):
+                trip.update(border_out=b_out.time(), border_in=b_in.time())
+        else:
+            a, b = rnd.sample(FOREIGN[:4], 2)
+            end = start + timedelta(days=rnd.randint(1, 5), hours=rnd.randint(2, 12))
+            t1 = _minute(start + timedelta(minutes=rnd.randint(30, 120)))
+            t3 = _minute(end - timedelta(minutes=rnd.randint(30, 120)))
+            t2 = _minute(t1 + (t3 - t1) * rnd.uniform(0.2, 0.5))
+            trip.update(country=b, end_dt=end, miesto=f"{a}/{b}",
+                        crossings=[(a, t1.time()), (b, t2), ("SK", t3)])
+        trips.append(trip)
+
+    trips.sort(key=lambda t: t["start_dt"])
+    return trips
+
+
+def _crossings_text(crossings) -> str | None:
+    if not crossings:
+        return None
+    return ", ".join(
+        f"{c} {at:%Y-%m-%d %H:%M}" if isinstance(at, datetime) else f"{c} {at:%H:%M}" for c, at in crossings
+    )
+
+
+def write_workbook(path: str | Path, trips: Sequence[Dict], sheet: str = "September 2025") -> Path:
+    """Writes trips in the Excel layout import_excel reads (write-only -> fast at 100k rows)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet)
+    ws.append(HEADER)
+    for t in trips:
+        s, e = t["start_dt"], t["end_dt"]
+        ws.append([
+            datetime.combine(s.date(), time()),
+            t.get("miesto", ""),
+            s.time(),
+            t["border_out"],
+            datetime.combine(e.date(), time()),
+            t["border_in"],
+            e.time(),
+            t["purpose"],
+            t["country"],
+            _crossings_text(t["crossings"]),
+        ])
+    wb.save(str(path))
+    return Path(path)
+
+
+def write_template(path: str | Path, pages: int = 2) -> Path:
+    """2-page stand-in for the accountant template PDF (filled sample text to be whited out)."""
+    import fitz
+
+    tpl = fitz.open()
+    for i in range(pages):
+        page = tpl.new_page()
+        for y in range(40, 800, 14):
+            page.insert_text((50, y), f"Cestovný príkaz - strana {i + 1} - riadok {y}", fontsize=9)
+    tpl.save(str(path))
+    tpl.close()
+    return Path(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Syntetický zošit služobných ciest")
+    parser.add_argument("n", type=int)
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+    out = write_workbook(args.out or f"synthetic_{args.n}.xlsx", generate_trips(args.n, args.seed))
+    print("Written:", out)
@@ -0,0 +1,219 @@
+from __future__ import annotations
+import argparse
+import re
+import sys
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Collection, Dict, List, Optional, Sequence, Set, Tuple
+
+from rates_bundle import load_rates_bundle
+from export_all import price_trip
+from export_writers import COLUMNS, RowWriters
+from import_excel import iter_sheets_trips
+from instrumentation import METRICS, add_cli_options, instrumented, stage
+from trip_model import DayTable
+
+# Ročné / hromadné vyúčtovanie:
+#   python cestovne.py settle --workbook "Sluzobne cesty.xlsx" --sheets 2025-01..2025-12 --workers 8
+#   python cestovne.py settle --workbook "Sluzobne cesty.xlsx" --pipeline --workers 4   (see pipeline.py)
+#   python cestovne.py query --ledger ledger.sqlite --from 2025-07-01 --to 2025-09-30 --by country
+#   python cestovne.py serve --port 8765   (warm pricing service, see service.py)
+# Work is split by workbook and sheet chunk over a process pool; the rates bundle is
+# built once and handed to every worker, results are merged into one output.
+
+SETTLE_COLUMNS = ["workbook", "sheet"] + COLUMNS
+
+# month names used in the sheet names (SK + EN, without diacritics)
+MONTHS = {
+    "januar": 1, "january": 1,
+    "februar": 2, "february": 2,
+    "marec": 3, "march": 3,
+    "april": 4,
+    "maj": 5, "may": 5,
+    "jun": 6, "june": 6,
+    "jul": 7, "july": 7,
+    "august": 8,
+    "september": 9,
+    "oktober": 10, "october": 10,
+    "november": 11,
+    "december": 12,
+}
+
+_SHEET_RE = re.compile(r"^([a-z]+)\s*(\d{4})$")
+_MONTH_RE = re.compile(r"^(\d{4})-(\d{1,2})$")
+
+
+def sheet_month(name: str) -> Optional[Tuple[int, int]]:
+    """'September 2025' / 'Januar2019' -> (2025, 9) / (2019, 1); None if not a monthly sheet"""
+    s = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().strip().lower()
+    m = _SHEET_RE.match(s)
+    if not m or m.group(1) not in MONTHS:
+        return None
+    return int(m.group(2)), MONTHS[m.group(1)]
+
+
+def _parse_month(s: str) -> Tuple[int, int]:
+    m = _MONTH_RE.match(s.strip())
+    if not m:
+        raise ValueError(f"Invalid month (expected YYYY-MM): {s}")
+    return int(m.group(1)), int(m.group(2))
+
+
+def _parse_spec(spec: str) -> Tuple[Set[str], List[Tuple[Tuple[int, int], Tuple[int, int]]]]:
+    """spec -> (literal sheet names, month ranges)"""
+    names, ranges = set(), []
+    for item in (x.strip() for x in spec.split(",")):
+        if ".." in item:
+            lo, hi = item.split("..", 1)
+            ranges.append((_parse_month(lo), _parse_month(hi)))
+        elif _MONTH_RE.match(item):
+            ranges.append((_parse_month(item), _parse_month(item)))
+        elif item:
+            names.add(item)
+    return names, ranges
+
+
+def select_sheets(sheetnames: Sequence[str], spec: Optional[str]) -> List[str]:
+    """
+    spec: comma separated items, each a month range 'YYYY-MM..YYYY-MM', a month 'YYYY-MM'
+    or a literal sheet name. None -> all sheets. Workbook order is kept.
+    """
+    if spec is None:
+        return list(sheetnames)
+
+    names, ranges = _parse_spec(spec)
+    missing = names - set(sheetnames)
+    if missing:
+        raise ValueError(f"Unknown sheets: {sorted(missing)}")
+
+    selected = []
+    for name in sheetnames:
+        ym = sheet_month(name)
+        if name in names or (ym is not None and any(lo <= ym <= hi for lo, hi in ranges)):
+            selected.append(name)
+    return selected
+
+
+# -----------------------------
+# Workers
+# -----------------------------
+
+_worker_rates = None
+
+
+def _init_worker(rates) -> None:
+    global _worker_rates
+    _worker_rates = rates
+
+
+def _settle_sheets(workbook: str, sheets: List[str], skip_incomplete: Collection[str], rates=None) -> DayTable:
+    rates = rates if rates is not None else _worker_rates
+    table = DayTable()  # compact result -> cheap to send back from a worker
+    trip_ids: Dict[str, int] = {}
+    for t in iter_sheets_trips(workbook, sheets, skip_incomplete):
+        sheet = t["sheet"]
+        trip_ids[sheet] = trip_ids.get(sheet, 0) + 1  # trip_id is per sheet, like the monthly export
+        table.add_trip(trip_ids[sheet], t.get("purpose", ""), price_trip(t, rates), workbook=workbook, sheet=sheet)
+    return table
+
+
+def settle(workbooks: List[str], sheets_spec: Optional[str], rates, workers: int = 1,
+           out: Optional[str] = None, csv_out: Optional[str] = None, parquet_out: Optional[str] = None,
+           ledger: Optional[str] = None, pipeline: bool = False) -> int:
+    """
+    pipeline: read / price / write run concurrently (pipeline.py) instead of one
+    after another; same rows, workers then price batches in processes
+    """
+    from openpyxl import load_workbook
+
+    # literal sheet names must have the columns; sheets picked by a month range / all sheets
+    # are skipped without them
+    literal = _parse_spec(sheets_spec)[0] if sheets_spec is not None else set()
+
+    jobs = []
+    sources = []
+    for wb_path in workbooks:
+        wb = load_workbook(wb_path, read_only=True)
+        names = select_sheets(wb.sheetnames, sheets_spec)
+        wb.close()
+        skippable = [n for n in names if n not in literal]
+        sources.append((wb_path, names, skippable))
+        size = max(1, -(-len(names) // max(workers, 1)))
+        jobs += [(wb_path, names[i:i + size], skippable) for i in range(0, len(names), size)]
+
+    with RowWriters(xlsx=out, csv_path=csv_out, parquet=parquet_out, columns=SETTLE_COLUMNS, ledger=ledger) as w:
+        if pipeline:
+            from pipeline import RowsSink, format_stats, run_pipeline
+
+            stats = run_pipeline(sources, rates, [RowsSink(w)], workers)
+            if METRICS.enabled:
+                print(format_stats(stats), file=sys.stderr)
+        elif workers <= 1:
+            for wb_path, names, skippable in jobs:
+                for row in _settle_sheets(wb_path, names, skippable, rates).iter_rows():
+                    w.write(row)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rates,)) as pool:
+                parts = pool.map(_settle_sheets, *zip(*jobs)) if jobs else []
+                for table in parts:  # map keeps job order -> deterministic output
+                    for row in table.iter_rows():
+                        w.write(row)
+    return w.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="cestovne", description="Cestovné náhrady - hromadné spracovanie")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("settle", help="vyúčtovanie stravného za viac mesiacov / zošitov")
+    p.add_argument("--workbook", action="append", required=True, help="zošit (možno zadať viackrát)")
+    p.add_argument("--sheets", default=None, help="napr. 2025-01..2025-12, 2025-09 alebo názov hárku; default všetky")
+    p.add_argument("--rates", default="rates.yml")
+    p.add_argument("--workers", type=int, default=1)
+    p.add_argument("--out", default="vyuctovanie.xlsx")
+    p.add_argument("--csv", default=None)
+    p.add_argument("--parquet", default=None)
+    p.add_argument("--ledger", default=None, help="zapíš dni aj do ledgera (SQLite); hárky sa v ňom nahradia")
+    p.add_argument("--pipeline", action="store_true",
+                   help="čítanie, výpočet a zápis súbežne (ohraničené fronty); --workers = procesy na výpočet")
+    add_cli_options(p)  # stage timings cover the main process only (use --workers 1 for detail)
+    q = sub.add_parser("query", help="súčty stravného z ledgera")
+    q.add_argument("--ledger", required=True)
+    q.add_argument("--from", dest="start", default=None, help="od dňa YYYY-MM-DD (vrátane)")
+    q.add_argument("--to", dest="end", default=None, help="do dňa YYYY-MM-DD (vrátane)")
+    q.add_argument("--country", default=None)
+    q.add_argument("--by", default=None, help="country, currency, day, month, quarter, year, sheet, trip")
+    s = sub.add_parser("serve", help="lokálna HTTP služba na výpočet stravného (dávky ciest)")
+    s.add_argument("--rates", default="rates.yml")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        from service import serve
+
+        serve(args.rates, args.host, args.port)
+
+    if args.command == "query":
+        from ledger import Ledger
+
+        with Ledger(args.ledger) as led:
+            country = args.country.upper() if args.country else None
+            if args.by is None:
+                print(f"{led.total(args.start, args.end, country):.2f} EUR")
+            else:
+                for r in led.totals_by(args.by, args.start, args.end, country):
+                    print(f"{r['key']:<24} {r['trip_days']:>8} {r['eur_amount']:>12.2f} EUR")
+
+    if args.command == "settle":
+        with instrumented(args):
+            with stage("rates"):
+                rates = load_rates_bundle(args.rates)
+            with stage("settle"):
+                n = settle(args.workbook, args.sheets, rates, args.workers, args.out, args.csv, args.parquet,
+                           args.ledger, args.pipeline)
+        print(f"Exported {n} rows: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
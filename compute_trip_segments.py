@@ -1,6 +1,11 @@
 from __future__ import annotations
 from datetime import datetime, timedelta, time
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from instrumentation import timed
+from trip_model import TripDay
+
+HOME = "SK"
 
 def _combine_date_time(base_date, t):
     # base_date is date, t is datetime.time
@@ -29,31 +34,98 @@ def resolve_border_datetimes(start_dt: datetime, end_dt: datetime, border_out_ti
         raise ValueError("Border times out of trip bounds")
     return b_out, b_in
 
+def resolve_crossings(start_dt: datetime, end_dt: datetime, crossings: Sequence[Tuple[str, object]]):
+    """
+    crossings: ordered (country entered, time or datetime) pairs, e.g.
+      [("AT", time(6, 30)), ("DE", time(11, 15)), ("SK", time(19, 40))]
+    One sweep: a bare time is placed on the first date where it is not before the
+    previous crossing (the first one may equal start_dt, the rest must be later),
+    same inference as resolve_border_datetimes. Returns [(country, datetime), ...].
+    """
+    out: List[Tuple[str, datetime]] = []
+    prev = start_dt
+    for i, (country, at) in enumerate(crossings):
+        if isinstance(at, datetime):
+            dt = at
+        else:
+            dt = _combine_date_time(prev.date(), at)
+            if dt < prev or (i and dt == prev):
+                dt = dt + timedelta(days=1)
+        if dt < prev or (i and dt == prev) or dt > end_dt:
+            raise ValueError("Border times out of trip bounds")
+        out.append((str(country).strip().upper(), dt))
+        prev = dt
+    return out
+
+
+def crossing_segments(start_dt: datetime, end_dt: datetime, crossings) -> List[Tuple[str, datetime, datetime]]:
+    """Consecutive (country, seg_start, seg_end) between the crossings, starting at home (SK)."""
+    segs = []
+    country, prev = HOME, start_dt
+    for next_country, dt in resolve_crossings(start_dt, end_dt, crossings):
+        segs.append((country, prev, dt))
+        country, prev = next_country, dt
+    segs.append((country, prev, end_dt))
+    return segs
+
+
+def _trip_crossings(trip: Dict) -> Optional[List[Tuple[str, object]]]:
+    """Ordered crossings of a trip: "crossings" if given, else the legacy border_out/border_in pair."""
+    crossings = trip.get("crossings")
+    if crossings:
+        return list(crossings)
+    # validated for every trip as before crossings existed (SK trips included)
+    b_out, b_in = resolve_border_datetimes(trip["start_dt"], trip["end_dt"], trip.get("border_out"), trip.get("border_in"))
+    if trip["country"] != HOME and b_out is not None:
+        return [(trip["country"], b_out), (HOME, b_in)]
+    return None
+
+
+@timed("segment")
 def split_trip_into_country_segments(trip: Dict):
     """
     Returns list of (country, seg_start, seg_end)
-    Assumes single foreign country in trip["country"] when != SK.
-    Uses border_out/border_in when present.
+    - trip["crossings"]: ordered (country, time/datetime) pairs, the trip starts in SK
+      and each crossing switches to the country entered (SK -> AT -> DE -> SK)
+    - otherwise a single foreign country in trip["country"] split by border_out/border_in
+      when present, or one segment for the whole trip
     """
     start_dt = trip["start_dt"]
     end_dt = trip["end_dt"]
-    country = trip["country"]
 
-    b_out, b_in = resolve_border_datetimes(start_dt, end_dt, trip.get("border_out"), trip.get("border_in"))
-
-    if country != "SK" and b_out and b_in:
-        segs = [
-            ("SK", start_dt, b_out),
-            (country, b_out, b_in),
-            ("SK", b_in, end_dt),
-        ]
+    crossings = _trip_crossings(trip)
+    if crossings is None:
+        segs = [(trip["country"], start_dt, end_dt)]
     else:
-        segs = [(country, start_dt, end_dt)]
+        segs = crossing_segments(start_dt, end_dt, crossings)
 
     # drop zero/negative
     segs = [(c, s, e) for (c, s, e) in segs if e > s]
     return segs
 
+
+def iter_country_days(segments) -> Iterator[Tuple[str, object, float]]:
+    """
+    (country, day, hours) for consecutive segments in one sweep over the day
+    boundaries -> O(segments + days); same hours as hours_in_day, zero-hour days included.
+    """
+    for country, seg_start, seg_end in segments:
+        d = seg_start.date()
+        day_start = datetime.combine(d, time(0, 0, 0))
+        while d <= seg_end.date():
+            day_end = day_start + timedelta(days=1)
+            s = max(seg_start, day_start)
+            e = min(seg_end, day_end)
+            yield country, d, (e - s).total_seconds() / 3600.0 if e > s else 0.0
+            d += timedelta(days=1)
+            day_start = day_end
+
+def iter_trip_days(trip: Dict) -> Iterator[TripDay]:
+    """TripDay per (country, day) with hours > 0, in segment order - what the exports price."""
+    for country, day, hrs in iter_country_days(split_trip_into_country_segments(trip)):
+        if hrs > 0:
+            yield TripDay(country, day, hrs)
+
 def iter_days(seg_start: datetime, seg_end: datetime):
     d = seg_start.date()
     while d <= seg_end.date():
@@ -1,66 +1,97 @@
-import pandas as pd
-from rates import load_rates
-from per_diem import compute_foreign_per_diem_for_day
-from sk_per_diem import load_sk_rates, compute_sk_per_diem_for_day
-from compute_trip_segments import split_trip_into_country_segments, iter_days, hours_in_day
-from import_excel import load_trips
+import argparse
+from typing import List
+
+from rates_bundle import load_rates_bundle
+from per_diem import price_day
+from compute_trip_segments import iter_trip_days
+from trip_model import DayResult, iter_result_rows
+from trip_cache import load_trips_cached
+from export_writers import RowWriters
+from incremental import IncrementalStore
+from instrumentation import add_cli_options, count, instrumented, stage
 
 RATES = "rates.yml"
 XLSX = "Sluzobne cesty.xlsx"
 SHEET = "September 2025"  # zmeň podľa potreby
 OUT = "vysledok_stravne_september_2025.xlsx"
 
-rates = load_rates(RATES)
-sk_schedules = load_sk_rates(RATES)
-trips = load_trips(XLSX, SHEET)
-
-rows = []
-
-for idx, t in enumerate(trips, start=1):
-    segments = split_trip_into_country_segments(t)
-    trip_total_eur = 0.0
-
-    for country, s, e in segments:
-        for day in iter_days(s, e):
-            hrs = hours_in_day(s, e, day)
-            if hrs <= 0:
-                continue
-
-            if country == "SK":
-                amt = compute_sk_per_diem_for_day(sk_schedules, day, hrs)
-                eur = amt
-                orig_amt = amt
-                orig_ccy = "EUR"
-            else:
-                res = compute_foreign_per_diem_for_day(rates, country, day, hrs)
-                orig_amt = res.original.amount
-                orig_ccy = res.original.currency
-                eur = res.eur.amount
-
-            trip_total_eur += eur
-
-            rows.append({
-                "trip_id": idx,
-                "purpose": t.get("purpose", ""),
-                "segment_country": country,
-                "day": str(day),
-                "hours": round(hrs, 2),
-                "orig_amount": orig_amt,
-                "orig_currency": orig_ccy,
-                "eur_amount": eur,
-            })
-
-    rows.append({
-        "trip_id": idx,
-        "purpose": t.get("purpose", ""),
-        "segment_country": "TOTAL",
-        "day": "",
-        "hours": "",
-        "orig_amount": "",
-        "orig_currency": "",
-        "eur_amount": round(trip_total_eur, 2),
-    })
-
-df = pd.DataFrame(rows)
-df.to_excel(OUT, index=False)
-print("Exported:", OUT)
+
+def price_trip(t, rates) -> List[DayResult]:
+    """Priced trip-days of one trip (integer cents)."""
+    days = []
+    for td in iter_trip_days(t):
+        days.append(price_day(rates, td))
+        count("trip_days")
+    return days
+
+
+def iter_trip_rows(idx, t, rates):
+    """Rows of one trip: one per trip-day, then its TOTAL row."""
+    count("trips")
+    return iter_result_rows(idx, t.get("purpose", ""), price_trip(t, rates))
+
+
+def iter_export_rows(trips, rates, store=None):
+    """store: optional incremental.IncrementalStore - unchanged trips reuse their stored rows"""
+    for idx, t in enumerate(trips, start=1):
+        if store is None:
+            yield from iter_trip_rows(idx, t, rates)
+            continue
+        rows = store.get(t)
+        if rows is None:
+            rows = list(iter_trip_rows(idx, t, rates))
+            store.put(t, rows)
+        for row in rows:
+            row["trip_id"] = idx
+            yield row
+
+
+def export(trips, rates, out=OUT, csv_out=None, parquet_out=None, store=None,
+           ledger=None, workbook=XLSX, sheet=SHEET) -> int:
+    """
+    Streams the rows into the requested outputs; returns the number of rows written.
+    ledger: optional SQLite ledger path; the (workbook, sheet) rows there are replaced
+    """
+    with stage("export"), \
+            RowWriters(xlsx=out, csv_path=csv_out, parquet=parquet_out, ledger=ledger, workbook=workbook,
+                       sheet=sheet) as w:
+        for row in iter_export_rows(trips, rates, store):
+            w.write(row)
+        with stage("export.save"):
+            w.close()
+    count("rows", w.rows)
+    return w.rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stravného po dňoch do XLSX (voliteľne CSV/Parquet)")
+    parser.add_argument("--sheet", default=SHEET)
+    parser.add_argument("--out", default=OUT)
+    parser.add_argument("--csv", default=None, help="aj CSV výstup")
+    parser.add_argument("--parquet", default=None, help="aj Parquet výstup (pyarrow)")
+    parser.add_argument("--incremental", default=None, metavar="STATE.sqlite",
+                        help="prepočítaj len zmenené cesty (stav v SQLite)")
+    parser.add_argument("--ledger", default=None, metavar="LEDGER.sqlite",
+                        help="zapíš dni aj do ledgera (SQLite) pre dotazy naprieč mesiacmi")
+    add_cli_options(parser)
+    args = parser.parse_args(argv)
+
+    with instrumented(args):
+        with stage("rates"):
+            rates = load_rates_bundle(RATES)
+        trips = load_trips_cached(XLSX, args.sheet)
+
+        store = IncrementalStore(args.incremental, rates) if args.incremental else None
+        try:
+            export(trips, rates, args.out, csv_out=args.csv, parquet_out=args.parquet, store=store,
+                   ledger=args.ledger, sheet=args.sheet)
+        finally:
+            if store is not None:
+                store.close()
+    print("Exported:", args.out)
+    if store is not None:
+        print(f"Incremental: {store.recomputed} recomputed, {store.reused} reused")
+
+
+if __name__ == "__main__":
+    main()
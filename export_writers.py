@@ -0,0 +1,192 @@
+from __future__ import annotations
+import csv
+import os
+from contextlib import suppress
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Row writers for the per-diem export: rows are written as they are computed, so
+# memory stays flat regardless of how many trips are exported.
+# Files are written next to the target (<name>.part) and renamed over it on
+# close(); abort() drops them, so a failed run leaves the previous outputs intact.
+
+COLUMNS = [
+    "trip_id",
+    "purpose",
+    "segment_country",
+    "day",
+    "hours",
+    "orig_amount",
+    "orig_currency",
+    "eur_amount",
+]
+
+
+# Parquet column types; columns not listed here are strings
+_PARQUET_TYPES = {
+    "trip_id": "int64",
+    "hours": "float64",
+    "orig_amount": "float64",
+    "eur_amount": "float64",
+}
+
+
+def _part(path: Path) -> Path:
+    return path.with_name(path.name + ".part")
+
+
+def _discard(path: Path) -> None:
+    with suppress(FileNotFoundError):
+        path.unlink()
+
+
+def _cell(v):
+    # "" placeholders (TOTAL rows) -> empty cell instead of a text cell
+    return None if v == "" else v
+
+
+class XlsxRowWriter:
+    """openpyxl write-only workbook: rows are flushed to disk, numbers stay numeric cells."""
+
+    def __init__(self, path: str | Path, columns: List[str] = COLUMNS, sheet: str = "Sheet1"):
+        from openpyxl import Workbook
+
+        self.path = Path(path)
+        self.columns = columns
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(sheet)
+        self._ws.append(columns)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._ws.append([_cell(row.get(c, "")) for c in self.columns])
+
+    def close(self) -> None:
+        self._wb.save(str(_part(self.path)))
+        os.replace(_part(self.path), self.path)
+
+    def abort(self) -> None:
+        # a write-only workbook is only finished (and its temp sheet file removed) by
+        # save(): save to the part file and drop it; the target is not touched
+        try:
+            self._wb.save(str(_part(self.path)))
+        finally:
+            _discard(_part(self.path))
+
+
+class CsvRowWriter:
+    def __init__(self, path: str | Path, columns: List[str] = COLUMNS):
+        self.path = Path(path)
+        self.columns = columns
+        self._f = open(_part(self.path), "w", newline="", encoding="utf-8")
+        self._w = csv.writer(self._f)
+        self._w.writerow(columns)
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._w.writerow([row.get(c, "") for c in self.columns])
+
+    def close(self) -> None:
+        self._f.close()
+        os.replace(_part(self.path), self.path)
+
+    def abort(self) -> None:
+        self._f.close()
+        _discard(_part(self.path))
+
+
+class ParquetRowWriter:
+    """pyarrow ParquetWriter fed in fixed-size batches (one row group per batch)."""
+
+    def __init__(self, path: str | Path, columns: List[str] = COLUMNS, batch_size: int = 50_000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.path = Path(path)
+        self.columns = columns
+        self.batch_size = batch_size
+        self._schema = pa.schema([(c, pa.type_for_alias(_PARQUET_TYPES.get(c, "string"))) for c in columns])
+        self._writer = pq.ParquetWriter(str(_part(self.path)), self._schema)
+        self._buf: Dict[str, list] = {c: [] for c in columns}
+
+    def write(self, row: Dict[str, Any]) -> None:
+        for c in self.columns:
+            self._buf[c].append(_cell(row.get(c, "")))
+        if len(self._buf[self.columns[0]]) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buf[self.columns[0]]:
+            self._writer.write_table(self._pa.Table.from_pydict(self._buf, schema=self._schema))
+            self._buf = {c: [] for c in self.columns}
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+        os.replace(_part(self.path), self.path)
+
+    def abort(self) -> None:
+        with suppress(Exception):
+            self._writer.close()
+        _discard(_part(self.path))
+
+
+class RowWriters:
+    """
+    Fans each row out to every configured output; use as a context manager.
+    Leaving the block with an exception aborts every output (no file replaced,
+    ledger rolled back) instead of closing it.
+    """
+
+    def __init__(self, xlsx: Optional[str | Path] = None, csv_path: Optional[str | Path] = None,
+                 parquet: Optional[str | Path] = None, columns: List[str] = COLUMNS,
+                 ledger: Optional[str | Path] = None, workbook: str = "", sheet: str = ""):
+        """ledger: SQLite trip-day ledger (see ledger.py); workbook/sheet tag rows that lack them"""
+        self.writers: List[Any] = []
+        if xlsx:
+            self.writers.append(XlsxRowWriter(xlsx, columns))
+        if csv_path:
+            self.writers.append(CsvRowWriter(csv_path, columns))
+        if parquet:
+            self.writers.append(ParquetRowWriter(parquet, columns))
+        if ledger:
+            from ledger import LedgerWriter
+
+            self.writers.append(LedgerWriter(ledger, workbook, sheet))
+        self.rows = 0
+        self._finished = False
+
+    def write(self, row: Dict[str, Any]) -> None:
+        for w in self.writers:
+            w.write(row)
+        self.rows += 1
+
+    def close(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        # the ledger is last -> it only commits once every file is in place
+        for i, w in enumerate(self.writers):
+            try:
+                w.close()
+            except BaseException:
+                for rest in self.writers[i + 1:]:
+                    with suppress(Exception):
+                        rest.abort()
+                raise
+
+    def abort(self) -> None:
+        if self._finished:
+            return
+        self._finished = True
+        for w in self.writers:
+            with suppress(Exception):
+                w.abort()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -1,6 +1,41 @@
-import pandas as pd
-from datetime import datetime, time
-from typing import Optional
+from __future__ import annotations
+from datetime import date, datetime, time
+from itertools import chain
+import re
+from typing import TYPE_CHECKING, Collection, Dict, Iterator, List, Optional, Tuple
+
+from instrumentation import stage, timed
+from trip_model import Trip
+
+if TYPE_CHECKING:  # annotations only
+    import numpy as np
+    import pandas as pd
+
+# pandas is imported inside the DataFrame-based loaders only; the streaming reader
+# (openpyxl) and the cell parsers work without it.
+
+REQUIRED_COLUMNS = ["country", "datum", "odchod", "navrat", "prichod"]
+# optional multi-country itinerary, e.g. "AT 06:30, DE 11:15, SK 19:40"
+CROSSINGS_COLUMNS = ("prechody hranic", "prechody hraníc")
+
+_HHMM_RE = re.compile(r"^(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?$")
+
+
+def _is_missing(v) -> bool:
+    # NaN / NaT compare unequal to themselves; pd.NA refuses the comparison
+    try:
+        return bool(v != v)
+    except TypeError:
+        return True
+
+
+def _serial_time(x: float) -> Optional[time]:
+    """Excel time serial (fraction of a day, 0 <= x < 1) -> time rounded to the second"""
+    if not 0 <= x < 1:
+        return None
+    secs = int(round(x * 86400)) % 86400
+    return time(secs // 3600, secs // 60 % 60, secs % 60)
+
 
 def _to_time(v) -> Optional[time]:
     """
@@ -8,72 +43,370 @@ def _to_time(v) -> Optional[time]:
       - datetime.time -> return as-is
       - datetime/datetime64 -> take .time()
       - string "HH:MM" / "HH:MM:SS" -> parse
+      - float 0..1 (Excel time serial, unformatted cell) -> time rounded to the second
       - NaN/None/empty -> None
-      - float (Excel time serial) -> treat as invalid and return None (safe default)
-        (If later you want to support floats, we can convert 0..1 to time.)
+    Scalar twin of time_offsets(); both must accept the same cells.
     """
-    if v is None or (isinstance(v, float) and pd.isna(v)):
-        return None
-    if pd.isna(v):
+    if v is None or _is_missing(v):
         return None
 
     if isinstance(v, time):
         return v
 
-    # pandas Timestamp / python datetime
-    if isinstance(v, pd.Timestamp):
-        return v.to_pydatetime().time()
+    # python datetime / pandas Timestamp (a datetime subclass)
     if isinstance(v, datetime):
         return v.time()
 
     # strings
     if isinstance(v, str):
-        s = v.strip()
-        if not s:
+        m = _HHMM_RE.match(v.strip())
+        if not m:
             return None
-        # allow HH:MM or HH:MM:SS
-        for fmt in ("%H:%M", "%H:%M:%S"):
+        h, mi, sec = (int(x or 0) for x in m.groups())
+        if h > 23 or mi > 59 or sec > 59:
+            return None
+        return time(h, mi, sec)
+
+    # numbers (Excel serials)
+    if isinstance(v, (int, float)) and not isinstance(v, bool):
+        return _serial_time(float(v))
+
+    return None
+
+
+_CROSSING_RE = re.compile(
+    r"^([A-Za-z]{2})\s+(?:(\d{4}-\d{2}-\d{2}|\d{1,2}\.\d{1,2}\.\d{4})\s+)?(\d{1,2}:\d{2}(?::\d{2})?)$"
+)
+
+
+def _to_crossings(v) -> Optional[List[Tuple[str, object]]]:
+    """
+    "AT 06:30, DE 11:15, SK 19:40" -> [("AT", time(6, 30)), ("DE", time(11, 15)), ("SK", time(19, 40))]
+    Items are separated by ',' or ';'. A date before the time ("DE 3.9.2025 19:40")
+    pins the crossing to that day, otherwise the date is inferred from the previous one.
+    Empty -> None.
+    """
+    if v is None or not isinstance(v, str) or not v.strip():
+        return None
+    out = []
+    for item in re.split(r"[,;]", v):
+        item = item.strip()
+        if not item:
+            continue
+        m = _CROSSING_RE.match(item)
+        if not m:
+            raise ValueError(f"Invalid border crossing: {item!r}")
+        country, day, hhmm = m.groups()
+        t = _to_time(hhmm)
+        if t is None:
+            raise ValueError(f"Invalid border crossing: {item!r}")
+        out.append((country.upper(), datetime.combine(_to_date(day), t) if day else t))
+    return out or None
+
+
+def _crossings_column(columns) -> Optional[str]:
+    return next((c for c in CROSSINGS_COLUMNS if c in columns), None)
+
+
+def _normalize_columns(columns) -> List[str]:
+    cols = [str(c).strip().lower() for c in columns]
+    missing = [c for c in REQUIRED_COLUMNS if c not in cols]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}. Found: {cols}")
+    return cols
+
+
+def _to_date(v) -> date:
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    if isinstance(v, str):
+        s = v.strip()
+        for fmt in ("%Y-%m-%d", "%d.%m.%Y", "%Y-%m-%d %H:%M:%S"):
             try:
-                return datetime.strptime(s, fmt).time()
+                return datetime.strptime(s, fmt).date()
             except ValueError:
                 pass
-        return None
+    raise ValueError(f"Invalid date: {v!r}")
 
-    # numbers (Excel serials) -> ignore for now (safe)
-    if isinstance(v, (int, float)):
-        return None
 
-    return None
+def _required_time(v, column: str) -> time:
+    t = _to_time(v)
+    if t is None:
+        raise ValueError(f"Invalid time in column '{column}': {v!r}")
+    return t
 
 
-def load_trips(path: str, sheet: str):
-    df = pd.read_excel(path, sheet_name=sheet)
+# -----------------------------
+# Streaming (openpyxl read-only)
+# -----------------------------
 
-    df.columns = [str(c).strip().lower() for c in df.columns]
+def _has_required_columns(header) -> bool:
+    cols = {str(c).strip().lower() for c in header or ()}
+    return all(c in cols for c in REQUIRED_COLUMNS)
 
-    req = ["country", "datum", "odchod", "navrat", "prichod"]
-    missing = [c for c in req if c not in df.columns]
-    if missing:
-        raise ValueError(f"Missing columns: {missing}. Found: {list(df.columns)}")
 
-    trips = []
-    for _, r in df.iterrows():
-        if pd.isna(r["datum"]) or pd.isna(r["odchod"]) or pd.isna(r["navrat"]) or pd.isna(r["prichod"]):
-            continue
+def _iter_sheet_trips(rows: Iterator[tuple], sheet: Optional[str] = None) -> Iterator[Dict]:
+    """
+    rows: values_only row tuples of one sheet, header first
+    sheet: when given, each trip is tagged with it under "sheet"
+    """
+    header = next(rows, None)
+    if header is None:
+        raise ValueError(f"Missing columns: {REQUIRED_COLUMNS}. Found: []")
+    idx: Dict[str, int] = {}
+    for i, c in enumerate(_normalize_columns(header)):
+        idx.setdefault(c, i)  # first occurrence wins (pandas mangles later duplicates)
 
-        if pd.isna(r["country"]) or str(r["country"]).strip() == "":
+    def col(row, name):
+        i = idx.get(name)
+        return row[i] if i is not None and i < len(row) else None
+
+    crossings_col = _crossings_column(idx)
+
+    for row in rows:
+        datum, odchod, navrat, prichod = (col(row, c) for c in ("datum", "odchod", "navrat", "prichod"))
+        if datum is None or odchod is None or navrat is None or prichod is None:
+            continue
+        country = col(row, "country")
+        if country is None or str(country).strip() == "":
             continue
 
-        start_dt = datetime.combine(pd.to_datetime(r["datum"]).date(), r["odchod"])
-        end_dt = datetime.combine(pd.to_datetime(r["navrat"]).date(), r["prichod"])
+        dovod = col(row, "dovod")
+        yield Trip(
+            country=str(country).strip().upper(),
+            start_dt=datetime.combine(_to_date(datum), _required_time(odchod, "odchod")),
+            end_dt=datetime.combine(_to_date(navrat), _required_time(prichod, "prichod")),
+            purpose="" if dovod is None else str(dovod),
+            border_out=_to_time(col(row, "prechod hranice tam")),
+            border_in=_to_time(col(row, "prechod hranice spat")),
+            crossings=_to_crossings(col(row, crossings_col)) if crossings_col else None,
+            sheet=sheet,
+        )
+
+
+def iter_trips(path: str, sheet: str) -> Iterator[Dict]:
+    """
+    Lazily yields the same trip dicts as load_trips(), reading the sheet row by row
+    (openpyxl read_only/values_only) without loading it into a DataFrame.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from _iter_sheet_trips(wb[sheet].iter_rows(values_only=True))
+    finally:
+        wb.close()
+
+
+def iter_sheets_trips(path: str, sheets: Optional[List[str]],
+                      skip_incomplete: bool | Collection[str] = False) -> Iterator[Trip]:
+    """
+    Streams the trips of the given sheets (None: all, workbook order; tagged with
+    "sheet") in sheet order, the workbook opened once; sheets without the required
+    columns are skipped when skip_incomplete is True or names them, otherwise they raise.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for name in wb.sheetnames if sheets is None else sheets:
+            rows = wb[name].iter_rows(values_only=True)
+            header = next(rows, None)
+            skip = skip_incomplete if isinstance(skip_incomplete, bool) else name in skip_incomplete
+            if skip and not _has_required_columns(header):
+                continue
+            yield from _iter_sheet_trips(chain([header], rows), sheet=name)
+    finally:
+        wb.close()
+
+
+@timed("import.load_sheets")
+def _load_sheets(path: str, sheets: Optional[List[str]], skip_incomplete: bool) -> List[Dict]:
+    """Reads the given sheets with the workbook opened once."""
+    return list(iter_sheets_trips(path, sheets, skip_incomplete))
+
+
+def load_all_trips(path: str, sheets: Optional[List[str]] = None, workers: int = 1) -> List[Dict]:
+    """
+    All monthly sheets in one workbook pass -> one combined trip list, each trip
+    tagged with its source sheet ("sheet"), in sheet order.
+    - sheets=None: every sheet that has the required columns (others are skipped);
+      explicitly named sheets must have them
+    - workers > 1: sheets are split into contiguous chunks parsed in a process pool,
+      each worker opening the workbook once
+    """
+    skip_incomplete = sheets is None
+    if workers <= 1:
+        return _load_sheets(path, sheets, skip_incomplete)  # sheets=None listed from the same handle
+    if sheets is None:
+        from openpyxl import load_workbook
+
+        wb = load_workbook(path, read_only=True)
+        sheets = list(wb.sheetnames)  # needed up front to split them between the workers
+        wb.close()
+
+    workers = max(1, min(workers, len(sheets)))
+    if workers == 1:
+        return _load_sheets(path, sheets, skip_incomplete)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = -(-len(sheets) // workers)
+    chunks = [sheets[i:i + size] for i in range(0, len(sheets), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = pool.map(_load_sheets, [path] * len(chunks), chunks, [skip_incomplete] * len(chunks))
+        return [t for part in parts for t in part]
+
+
+# -----------------------------
+# Vectorized (whole columns)
+# -----------------------------
+
+def time_offsets(col: pd.Series) -> np.ndarray:
+    """
+    Time-of-day column -> timedelta64[ns] offsets, NaT where missing or invalid.
+    Same cells as _to_time(): time, datetime/Timestamp, "HH:MM[:SS]" strings and
+    0..1 Excel serials. Typed columns are converted as a whole; object (mixed)
+    columns are factorized and each distinct value class is converted in bulk.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if pd.api.types.is_timedelta64_dtype(col):
+        return col.to_numpy(dtype="timedelta64[ns]")
+    if pd.api.types.is_datetime64_any_dtype(col):
+        return (col - col.dt.normalize()).to_numpy(dtype="timedelta64[ns]")
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return _serial_offsets(col.to_numpy(dtype="float64", na_value=np.nan))
+
+    codes, uniques = pd.factorize(col.to_numpy(dtype=object))  # missing -> -1
+    off = np.full(len(uniques), np.timedelta64("NaT"), dtype="timedelta64[ns]")
+    kind = np.array([
+        "time" if isinstance(v, time) else
+        "datetime" if isinstance(v, datetime) else
+        "str" if isinstance(v, str) else
+        "num" if isinstance(v, (int, float)) and not isinstance(v, bool) else
+        ""
+        for v in uniques
+    ], dtype=object)
+
+    m = kind == "time"
+    if m.any():
+        t = uniques[m]
+        us = np.array([((v.hour * 60 + v.minute) * 60 + v.second) * 1_000_000 + v.microsecond for v in t],
+                      dtype="int64")
+        off[m] = us.astype("timedelta64[us]")
+    m = kind == "datetime"
+    if m.any():
+        ts = pd.Series(pd.to_datetime(list(uniques[m])))
+        off[m] = (ts - ts.dt.normalize()).to_numpy(dtype="timedelta64[ns]")
+    m = kind == "str"
+    if m.any():
+        parts = pd.Series(uniques[m], dtype=object).str.strip().str.extract(_HHMM_RE.pattern).astype("float64")
+        h, mi, sec = (parts[i].to_numpy() for i in range(3))
+        sec = np.nan_to_num(sec)
+        ok = (h <= 23) & (mi <= 59) & (sec <= 59)  # NaN (no match) compares False
+        secs = np.where(ok, (h * 60 + mi) * 60 + sec, np.nan)
+        off[m] = _seconds_offsets(secs)
+    m = kind == "num"
+    if m.any():
+        off[m] = _serial_offsets(uniques[m].astype("float64"))
+
+    return np.where(codes < 0, np.timedelta64("NaT"), off[codes]).astype("timedelta64[ns]")
+
+
+def _seconds_offsets(secs: np.ndarray) -> np.ndarray:
+    import numpy as np
+
+    out = np.full(len(secs), np.timedelta64("NaT"), dtype="timedelta64[ns]")
+    ok = ~np.isnan(secs)
+    out[ok] = secs[ok].astype("int64").astype("timedelta64[s]")
+    return out
+
+
+def _serial_offsets(x: np.ndarray) -> np.ndarray:
+    """vectorized _serial_time: 0 <= x < 1 -> offset rounded to the second, else NaT"""
+    import numpy as np
+
+    with np.errstate(invalid="ignore"):
+        ok = (x >= 0) & (x < 1)
+    return _seconds_offsets(np.where(ok, np.rint(x * 86400) % 86400, np.nan))
+
+
+def _offset_times(off: np.ndarray) -> np.ndarray:
+    """timedelta64 offsets -> object array of datetime.time / None (each distinct offset built once)"""
+    import numpy as np
+    import pandas as pd
+
+    nat = np.isnat(off)
+    codes, uniques = pd.factorize(np.where(nat, 0, off.astype("timedelta64[us]").astype("int64")))
+    times = np.array([time(us // 3_600_000_000, us // 60_000_000 % 60, us // 1_000_000 % 60, us % 1_000_000)
+                      for us in uniques.tolist()] + [None], dtype=object)
+    return times[np.where(nat, len(uniques), codes)]
+
+
+def _required_offsets(col: pd.Series, column: str) -> pd.Series:
+    import numpy as np
+    import pandas as pd
+
+    off = time_offsets(col)
+    bad = np.isnat(off)
+    if bad.any():
+        raise ValueError(f"Invalid time in column '{column}': {col.iloc[int(bad.argmax())]!r}")
+    return pd.Series(off, index=col.index)
+
+
+def _optional_offsets(df: pd.DataFrame, column: str) -> pd.Series:
+    import numpy as np
+    import pandas as pd
+
+    if column not in df.columns:
+        return pd.Series(np.full(len(df), np.timedelta64("NaT"), dtype="timedelta64[ns]"), index=df.index)
+    return pd.Series(time_offsets(df[column]), index=df.index)
+
+
+def load_trips_frame(path: str, sheet: str) -> pd.DataFrame:
+    """
+    Trip table (country, start_dt, end_dt, purpose, border_out, border_in, crossings) with the
+    date and time columns converted in bulk instead of per row; border_out/border_in stay
+    timedelta64 offsets from midnight (NaT when missing), as expand_trips_to_days takes them.
+    """
+    import pandas as pd
+
+    with stage("import.read_excel"):
+        df = pd.read_excel(path, sheet_name=sheet)
+    df.columns = _normalize_columns(df.columns)
+
+    keep = df[["datum", "odchod", "navrat", "prichod"]].notna().all(axis=1)
+    keep &= df["country"].notna() & (df["country"].astype(str).str.strip() != "")
+    df = df[keep]
+
+    start_day = pd.to_datetime(df["datum"]).dt.normalize()
+    end_day = pd.to_datetime(df["navrat"]).dt.normalize()
+    purpose = df["dovod"] if "dovod" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    crossings_col = _crossings_column(df.columns)
+    crossings = df[crossings_col] if crossings_col else pd.Series(None, index=df.index, dtype=object)
+
+    return pd.DataFrame({
+        "country": df["country"].astype(str).str.strip().str.upper(),
+        "start_dt": start_day + _required_offsets(df["odchod"], "odchod"),
+        "end_dt": end_day + _required_offsets(df["prichod"], "prichod"),
+        "purpose": ["" if _is_missing(v) else str(v) for v in purpose],
+        "border_out": _optional_offsets(df, "prechod hranice tam"),
+        "border_in": _optional_offsets(df, "prechod hranice spat"),
+        "crossings": pd.Series([_to_crossings(v) for v in crossings], index=df.index, dtype=object),
+    }, index=df.index)
 
-        trips.append({
-            "country": str(r["country"]).strip().upper(),
-            "start_dt": start_dt,
-            "end_dt": end_dt,
-            "purpose": "" if pd.isna(r.get("dovod")) else str(r.get("dovod")),
-            "border_out": _to_time(r.get("prechod hranice tam")),
-            "border_in": _to_time(r.get("prechod hranice spat")),
-        })
 
-    return trips
+@timed("import.load_trips")
+def load_trips(path: str, sheet: str) -> List[Trip]:
+    df = load_trips_frame(path, sheet)
+    return [
+        Trip(country, start_dt.to_pydatetime(), end_dt.to_pydatetime(), purpose, border_out, border_in, crossings)
+        for country, start_dt, end_dt, purpose, border_out, border_in, crossings in zip(
+            df["country"], df["start_dt"], df["end_dt"], df["purpose"],
+            _offset_times(df["border_out"].to_numpy()), _offset_times(df["border_in"].to_numpy()), df["crossings"],
+        )
+    ]
@@ -0,0 +1,204 @@
+from __future__ import annotations
+import hashlib
+import json
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Incremental recomputation: per-trip result rows are kept in a small SQLite store,
+# addressed by a fingerprint of the trip inputs. Rates are remembered as per-key
+# effective-date intervals; when rates.yml changes, only trips whose dates fall
+# into a changed interval of a schedule they used are dropped and recomputed.
+# Each key also keeps a digest of its intervals, so unchanged keys are skipped
+# without parsing or rewriting them.
+
+STATE_VERSION = 2  # bump when the computation or the row layout changes
+
+_MAX_ORD = date.max.toordinal()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rates_state (key TEXT PRIMARY KEY, digest TEXT NOT NULL, intervals TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS trip_results (
+    fingerprint TEXT PRIMARY KEY,
+    first_day INTEGER NOT NULL,
+    last_day INTEGER NOT NULL,
+    deps TEXT NOT NULL,
+    rows TEXT NOT NULL
+);
+"""
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def trip_fingerprint(t: Dict) -> str:
+    return _digest(
+        t["country"],
+        t["start_dt"].isoformat(),
+        t["end_dt"].isoformat(),
+        None if t.get("border_out") is None else t["border_out"].isoformat(),
+        None if t.get("border_in") is None else t["border_in"].isoformat(),
+        t.get("purpose", ""),
+        [(c, at.isoformat()) for c, at in t.get("crossings") or ()],
+    )
+
+
+# -----------------------------
+# Rates -> per-key intervals
+# -----------------------------
+
+def rates_intervals(rates) -> Dict[str, List[Tuple[int, str]]]:
+    """key -> [(effective_from ordinal, content digest), ...] sorted; each valid until the next one"""
+    out: Dict[str, List[Tuple[int, str]]] = {}
+    out["bands"] = [(1, _digest(*[tuple(sorted(b.items())) for b in rates["foreign_bands"]]))]
+    for code, cr in rates["countries"].items():
+        out[f"country:{code}"] = [
+            (s.effective_from.toordinal(), _digest(cr.currency, s.daily_base)) for s in cr.schedules
+        ]
+    for cur, fxr in rates["fx"].items():
+        out[f"fx:{cur}"] = [(s.effective_from.toordinal(), _digest(s.rate)) for s in fxr.schedules]
+    history = rates.get("fx_history")
+    if history is not None:
+        used = {cr.currency.upper() for cr in rates["countries"].values()}
+        for cur in sorted(used & set(history.currencies())):
+            fxr = rates["fx"].get(cur)
+            ords, fx_rates = history.timeline(cur, fxr.schedules if fxr is not None else ())
+            # repr instead of a hash: thousands of daily fixings per currency
+            out[f"fx:{cur}"] = [(o, repr(r)) for o, r in zip(ords, fx_rates)]
+    out["sk"] = [
+        (s.effective_from.toordinal(), _digest(*[(b.min_hours_inclusive, b.max_hours_exclusive, b.amount) for b in s.bands]))
+        for s in rates["sk_schedules"]
+    ]
+    return {k: sorted(v, key=lambda iv: iv[0]) for k, v in out.items()}
+
+
+def changed_ranges(old: List[Tuple[int, str]], new: List[Tuple[int, str]]) -> List[Tuple[int, int]]:
+    """
+    Inclusive ordinal ranges on which the effective schedule differs between old and new.
+    Both lists sorted by start; one merge pass over the two.
+    """
+    if old == new:
+        return []
+    ranges: List[Tuple[int, int]] = []
+    i = j = 0
+    cur_old = cur_new = None
+    start = None  # start of the pending differing range
+    while i < len(old) or j < len(new):
+        p = min(old[i][0] if i < len(old) else _MAX_ORD + 1, new[j][0] if j < len(new) else _MAX_ORD + 1)
+        while i < len(old) and old[i][0] == p:
+            cur_old = old[i][1]
+            i += 1
+        while j < len(new) and new[j][0] == p:
+            cur_new = new[j][1]
+            j += 1
+        if cur_old != cur_new:
+            if start is None:
+                start = p
+        elif start is not None:
+            ranges.append((start, p - 1))
+            start = None
+    if start is not None:
+        ranges.append((start, _MAX_ORD))
+    return ranges
+
+
+def row_deps(rows: Iterable[Dict]) -> List[str]:
+    """Rate keys a trip's rows were computed from."""
+    deps = set()
+    for r in rows:
+        c = r["segment_country"]
+        if c == "TOTAL":
+            continue
+        if c == "SK":
+            deps.add("sk")
+        else:
+            deps.update(("bands", f"country:{c}", f"fx:{r['orig_currency']}"))
+    return sorted(deps)
+
+
+# -----------------------------
+# Store
+# -----------------------------
+
+class IncrementalStore:
+    """
+    store = IncrementalStore("stav.sqlite", rates)
+    rows = store.get(t)            # None -> recompute, then store.put(t, rows)
+    store.close()
+    Rows are stored without trip_id; the caller stamps the current one.
+    """
+
+    def __init__(self, path: str | Path, rates):
+        self.con = sqlite3.connect(str(path))
+        self.con.executescript(_SCHEMA)
+        self.reused = 0
+        self.recomputed = 0
+
+        version = self.con.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) != STATE_VERSION:
+            self.con.execute("DELETE FROM trip_results")
+            self.con.execute("DROP TABLE rates_state")
+            self.con.executescript(_SCHEMA)
+            self.con.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(STATE_VERSION),))
+
+        self._invalidate_for_rates(rates_intervals(rates))
+        self.con.commit()
+
+    def _invalidate_for_rates(self, current: Dict[str, List[Tuple[int, str]]]) -> None:
+        encoded = {k: json.dumps(v) for k, v in current.items()}
+        digests = {k: hashlib.sha1(v.encode("utf-8")).hexdigest() for k, v in encoded.items()}
+        stored = dict(self.con.execute("SELECT key, digest FROM rates_state"))
+        dirty = [k for k in digests if stored.get(k) != digests[k]]
+        removed = [k for k in stored if k not in digests]
+
+        changed = {}
+        for key in dirty + removed:
+            row = self.con.execute("SELECT intervals FROM rates_state WHERE key = ?", (key,)).fetchone()
+            old = [tuple(x) for x in json.loads(row[0])] if row else []
+            ranges = changed_ranges(old, current.get(key, []))
+            if ranges:
+                changed[key] = ranges
+
+        if changed:
+            stale = []
+            for fp, first, last, deps in self.con.execute("SELECT fingerprint, first_day, last_day, deps FROM trip_results"):
+                for key in json.loads(deps):
+                    if any(lo <= last and first <= hi for lo, hi in changed.get(key, ())):
+                        stale.append((fp,))
+                        break
+            self.con.executemany("DELETE FROM trip_results WHERE fingerprint = ?", stale)
+
+        self.con.executemany("DELETE FROM rates_state WHERE key = ?", [(k,) for k in removed])
+        self.con.executemany(
+            "INSERT OR REPLACE INTO rates_state VALUES (?, ?, ?)", [(k, digests[k], encoded[k]) for k in dirty]
+        )
+
+    def get(self, t: Dict) -> Optional[List[Dict]]:
+        hit = self.con.execute(
+            "SELECT rows FROM trip_results WHERE fingerprint = ?", (trip_fingerprint(t),)
+        ).fetchone()
+        if hit is None:
+            return None
+        self.reused += 1
+        return json.loads(hit[0])
+
+    def put(self, t: Dict, rows: List[Dict]) -> None:
+        self.recomputed += 1
+        stored = [{k: v for k, v in r.items() if k != "trip_id"} for r in rows]
+        self.con.execute(
+            "INSERT OR REPLACE INTO trip_results VALUES (?, ?, ?, ?, ?)",
+            (
+                trip_fingerprint(t),
+                t["start_dt"].date().toordinal(),
+                t["end_dt"].date().toordinal(),
+                json.dumps(row_deps(rows)),
+                json.dumps(stored),
+            ),
+        )
+
+    def close(self) -> None:
+        self.con.commit()
+        self.con.close()
@@ -0,0 +1,157 @@
+from __future__ import annotations
+import functools
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Stage timers and counters for the settlement scripts. Off by default: the
+# decorated hot functions (per-day per-diem, segmentation) then cost one flag check.
+#
+#   METRICS.enable()
+#   with stage("export"): ...
+#   @timed("segment") def split_trip_into_country_segments(...): ...
+#   count("trips", len(trips))      # trips, trip_days, lookups, rows, ...
+#   METRICS.write_json("timings.json")
+#
+# Stages nest (export contains segment and per_diem.*), so seconds are inclusive.
+
+
+class Metrics:
+    def __init__(self):
+        self.enabled = False
+        self.stages: Dict[str, list] = {}   # name -> [seconds, calls]
+        self.counters: Dict[str, int] = {}
+        self._caches: Dict[str, Any] = {}   # name -> object with info() (LruCache)
+
+    def enable(self) -> "Metrics":
+        self.enabled = True
+        return self
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.stages.clear()
+        self.counters.clear()
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        s = self.stages.get(name)
+        if s is None:
+            self.stages[name] = [seconds, calls]
+        else:
+            s[0] += seconds
+            s[1] += calls
+
+    def count(self, name: str, n: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def watch_cache(self, name: str, cache) -> None:
+        self._caches[name] = cache
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "stages": {k: {"seconds": round(v[0], 6), "calls": v[1]} for k, v in self.stages.items()},
+            "counters": dict(self.counters),
+            "caches": {k: c.info() for k, c in self._caches.items()},
+        }
+
+    def write_json(self, path: str | Path, **extra) -> None:
+        report = {"argv": sys.argv, **extra, **self.report()}
+        Path(path).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<28} {'seconds':>10} {'calls':>10}"]
+        for k, (sec, calls) in sorted(self.stages.items(), key=lambda kv: -kv[1][0]):
+            lines.append(f"{k:<28} {sec:>10.3f} {calls:>10}")
+        for k, v in self.counters.items():
+            lines.append(f"{k:<28} {v:>21}")
+        for k, c in self._caches.items():
+            info = c.info()
+            lines.append(f"{k:<28} {'hits ' + str(info['hits']):>10} {'misses ' + str(info['misses']):>10}")
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    if not METRICS.enabled:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        METRICS.add_time(name, time.perf_counter() - t0)
+
+
+def timed(name: str) -> Callable:
+    """Decorator: accumulates wall time and call count of the function under name."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                METRICS.add_time(name, time.perf_counter() - t0)
+        return wrapper
+    return deco
+
+
+def count(name: str, n: int = 1) -> None:
+    METRICS.count(name, n)
+
+
+@contextmanager
+def profiled(path: Optional[str | Path], top: int = 25) -> Iterator[None]:
+    """cProfile around the block; stats dumped to path (pstats format) + top entries to stderr."""
+    if not path:
+        yield
+        return
+    import cProfile
+    import pstats
+
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof.dump_stats(str(path))
+        pstats.Stats(prof, stream=sys.stderr).sort_stats("cumulative").print_stats(top)
+
+
+def add_cli_options(parser) -> None:
+    parser.add_argument("--profile", default=None, metavar="OUT.pstats", help="cProfile výstup (pstats)")
+    parser.add_argument("--timings", default=None, metavar="OUT.json", help="časy etáp a počítadlá do JSON")
+
+
+@contextmanager
+def instrumented(args) -> Iterator[Metrics]:
+    """Wraps a CLI run according to --profile / --timings (see add_cli_options)."""
+    if args.timings:
+        METRICS.reset()  # the report covers this run only
+        METRICS.enable()
+        from per_diem import FOREIGN_RESULT_CACHE
+        from sk_per_diem import SK_RESULT_CACHE
+
+        METRICS.watch_cache("per_diem.foreign_cache", FOREIGN_RESULT_CACHE)
+        METRICS.watch_cache("per_diem.sk_cache", SK_RESULT_CACHE)
+    t0 = time.perf_counter()
+    try:
+        with profiled(args.profile):
+            yield METRICS
+        if args.timings:
+            METRICS.write_json(args.timings, total_seconds=round(time.perf_counter() - t0, 6))
+            print(METRICS.summary(), file=sys.stderr)
+    finally:
+        # the registry is global: later runs in the same process start disabled
+        METRICS.disable()
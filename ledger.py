@@ -0,0 +1,218 @@
+from __future__ import annotations
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Persistent trip-day ledger (SQLite). The exporters append their per-day rows;
+# re-exporting a sheet replaces that sheet's rows. Amounts are integer cents,
+# days ISO text (range scans on the day index), TOTAL rows are not stored.
+#
+#   led = Ledger("ledger.sqlite")
+#   led.total(start="2025-07-01", end="2025-09-30", country="DE")
+#   led.totals_by("quarter", country="DE")
+
+LEDGER_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS trip_days (
+    workbook TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    trip_id INTEGER NOT NULL,
+    purpose TEXT NOT NULL,
+    segment_country TEXT NOT NULL,
+    day TEXT NOT NULL,
+    hours REAL NOT NULL,
+    orig_cents INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    eur_cents INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trip_days_day ON trip_days (day);
+CREATE INDEX IF NOT EXISTS trip_days_country_day ON trip_days (segment_country, day);
+CREATE INDEX IF NOT EXISTS trip_days_trip ON trip_days (workbook, sheet, trip_id);
+"""
+
+# group-by keys for totals_by()
+GROUPS = {
+    "country": "segment_country",
+    "currency": "currency",
+    "day": "day",
+    "month": "substr(day, 1, 7)",
+    "quarter": "substr(day, 1, 4) || '-Q' || ((CAST(substr(day, 6, 2) AS INTEGER) + 2) / 3)",
+    "year": "substr(day, 1, 4)",
+    "sheet": "sheet",
+    "trip": "workbook || '/' || sheet || '#' || trip_id",
+}
+
+_INSERT = "INSERT INTO trip_days VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+def _day(d: Optional[date | str]) -> Optional[str]:
+    return None if d is None else str(d)
+
+
+def _cents(v) -> int:
+    return int(round(float(v) * 100))
+
+
+class Ledger:
+    def __init__(self, path: str | Path):
+        self.con = sqlite3.connect(str(path))
+        self.con.executescript(_SCHEMA)
+        version = self.con.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None:
+            self.con.execute("INSERT INTO meta VALUES ('version', ?)", (str(LEDGER_VERSION),))
+        elif int(version[0]) != LEDGER_VERSION:
+            raise ValueError(f"Ledger {path} has version {version[0]}, expected {LEDGER_VERSION}")
+        self.con.commit()
+
+    def close(self) -> None:
+        self.con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # -----------------------------
+    # Writing
+    # -----------------------------
+
+    def replace_rows(self, rows: Iterable[Dict[str, Any]], workbook: str = "", sheet: str = "",
+                     batch_size: int = 10_000) -> int:
+        """
+        Export rows (export_writers.COLUMNS, optionally with workbook/sheet) in one
+        transaction; rows of every (workbook, sheet) seen are replaced. Returns rows stored.
+        """
+        writer = LedgerWriter(self, workbook, sheet, batch_size)
+        with self.con:
+            for row in rows:
+                writer.write(row)
+            writer.flush()
+        return writer.rows
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+
+    def _where(self, start, end, country, currency, workbook, sheet) -> Tuple[str, List[Any]]:
+        cond, args = [], []
+        for sql, v in (
+            ("day >= ?", _day(start)),
+            ("day <= ?", _day(end)),
+            ("segment_country = ?", country),
+            ("currency = ?", currency),
+            ("workbook = ?", workbook),
+            ("sheet = ?", sheet),
+        ):
+            if v is not None:
+                cond.append(sql)
+                args.append(v)
+        return (" WHERE " + " AND ".join(cond)) if cond else "", args
+
+    def total(self, start: Optional[date | str] = None, end: Optional[date | str] = None,
+              country: Optional[str] = None, currency: Optional[str] = None,
+              workbook: Optional[str] = None, sheet: Optional[str] = None) -> float:
+        """EUR total over the filters; start/end are inclusive days."""
+        where, args = self._where(start, end, country, currency, workbook, sheet)
+        (cents,) = self.con.execute(f"SELECT COALESCE(SUM(eur_cents), 0) FROM trip_days{where}", args).fetchone()
+        return cents / 100
+
+    def totals_by(self, group: str, start: Optional[date | str] = None, end: Optional[date | str] = None,
+                  country: Optional[str] = None, currency: Optional[str] = None,
+                  workbook: Optional[str] = None, sheet: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        group: one of GROUPS (country, currency, day, month, quarter, year, sheet, trip).
+        Rows {key, trip_days, eur_amount}, plus orig_amount when grouped by country or currency.
+        """
+        if group not in GROUPS:
+            raise ValueError(f"Unknown group {group!r}; expected one of {sorted(GROUPS)}")
+        where, args = self._where(start, end, country, currency, workbook, sheet)
+        orig = group in ("country", "currency")
+        sql = (
+            f"SELECT {GROUPS[group]} AS k, COUNT(*), SUM(eur_cents)"
+            + (", SUM(orig_cents), MIN(currency)" if orig else "")
+            + f" FROM trip_days{where} GROUP BY k ORDER BY k"
+        )
+        out = []
+        for r in self.con.execute(sql, args):
+            item = {"key": r[0], "trip_days": r[1], "eur_amount": r[2] / 100}
+            if orig:
+                item["orig_amount"] = r[3] / 100
+                item["orig_currency"] = r[4]
+            out.append(item)
+        return out
+
+    def days(self, start: Optional[date | str] = None, end: Optional[date | str] = None,
+             country: Optional[str] = None, currency: Optional[str] = None,
+             workbook: Optional[str] = None, sheet: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Stored trip-days in day order, in the export row layout (+ workbook/sheet)."""
+        where, args = self._where(start, end, country, currency, workbook, sheet)
+        cur = self.con.execute(
+            "SELECT workbook, sheet, trip_id, purpose, segment_country, day, hours, orig_cents, currency, eur_cents"
+            f" FROM trip_days{where} ORDER BY day, workbook, sheet, trip_id",
+            args,
+        )
+        return [
+            {
+                "workbook": wb, "sheet": sh, "trip_id": tid, "purpose": p, "segment_country": c, "day": d,
+                "hours": h, "orig_amount": oc / 100, "orig_currency": ccy, "eur_amount": ec / 100,
+            }
+            for wb, sh, tid, p, c, d, h, oc, ccy, ec in cur
+        ]
+
+
+class LedgerWriter:
+    """
+    Row-writer face of the ledger (write/close/abort like export_writers' writers).
+    Rows are inserted in executemany batches inside one transaction committed on
+    close; abort() rolls it back, sheets replaced so far included.
+    ledger: a Ledger, or a path -> opened here and closed on close()
+    """
+
+    def __init__(self, ledger: Ledger | str | Path, workbook: str = "", sheet: str = "", batch_size: int = 10_000):
+        self._owned = not isinstance(ledger, Ledger)
+        self.ledger = Ledger(ledger) if self._owned else ledger
+        self.workbook = workbook
+        self.sheet = sheet
+        self.batch_size = batch_size
+        self.rows = 0
+        self._buf: List[tuple] = []
+        self._replaced = set()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if row["segment_country"] == "TOTAL":
+            return
+        wb = row.get("workbook", self.workbook) or ""
+        sh = row.get("sheet", self.sheet) or ""
+        if (wb, sh) not in self._replaced:
+            self.flush()
+            self.ledger.con.execute("DELETE FROM trip_days WHERE workbook = ? AND sheet = ?", (wb, sh))
+            self._replaced.add((wb, sh))
+        self._buf.append((
+            wb, sh, row["trip_id"], row.get("purpose", "") or "", row["segment_country"], str(row["day"]),
+            float(row["hours"]), _cents(row["orig_amount"]), row["orig_currency"], _cents(row["eur_amount"]),
+        ))
+        self.rows += 1
+        if len(self._buf) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buf:
+            self.ledger.con.executemany(_INSERT, self._buf)
+            self._buf = []
+
+    def close(self) -> None:
+        self.flush()
+        self.ledger.con.commit()
+        if self._owned:
+            self.ledger.close()
+
+    def abort(self) -> None:
+        """Rolls back everything written (and replaced) since the last commit."""
+        self._buf = []
+        self.ledger.con.rollback()
+        if self._owned:
+            self.ledger.close()
@@ -1,7 +1,12 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
-import fitz  # PyMuPDF
+from typing import TYPE_CHECKING, Iterable, Optional
+
+if TYPE_CHECKING:  # annotations only
+    import fitz
+
+# PyMuPDF (fitz) is imported inside the functions -> importing this module stays cheap
 
 def mm(mm_val: float) -> float:
     # PDF body (pt) = mm * 72 / 25.4
@@ -23,31 +28,126 @@ def fill_pdf_template(
     layout: dict[str, FieldBox],
     font_path: Path,
 ) -> None:
+    fill_pdf_template_batch(template_pdf, [fields], layout, font_path, out_pdf)
+
+def fill_pdf_template_batch(
+    template_pdf: Path,
+    records: Iterable[dict[str, str]],
+    layout: dict[str, FieldBox],
+    font_path: Path,
+    out_pdf: Path,
+    chunk_size: Optional[int] = None,
+) -> list[Path]:
+    """
+    One filled copy of the template per record, the template opened and the font
+    loaded once. All copies go to out_pdf, or with chunk_size to files of at most
+    chunk_size records each (cesty.pdf -> cesty_001.pdf, cesty_002.pdf, ...).
+    Pages are copied with insert_pdf, so the template's form fields, links and
+    annotations are kept on every copy.
+    Returns the written paths.
+    """
+    import fitz
+
+    out_pdf = Path(out_pdf)
+    written: list[Path] = []
+
+    def save(doc) -> None:
+        path = out_pdf if not chunk_size else out_pdf.with_name(f"{out_pdf.stem}_{len(written) + 1:03d}{out_pdf.suffix}")
+        # only the glyphs actually used stay embedded; garbage=2 (unused objects
+        # dropped, xrefs compacted) - garbage=3 also merges duplicates but grows
+        # quadratically with the page count (100 records: 26 s to save instead of <1 s)
+        doc.subset_fonts()
+        doc.save(str(path), garbage=2, deflate=True)
+        written.append(path)
+
     tpl = fitz.open(str(template_pdf))
-    out = fitz.open()
+    out = None
+    try:
+        font = fitz.Font(fontfile=str(font_path))
+        out = fitz.open()
+        n = 0
+        for fields in records:
+            if chunk_size and n == chunk_size:
+                save(out)
+                out.close()
+                out = fitz.open()
+                n = 0
+            first = out.page_count
+            # skopíruj všetky strany šablóny
+            out.insert_pdf(tpl)
+            write_fields(out, fields, layout, font, first_page=first)
+            n += 1
+        if n:
+            save(out)
+    finally:
+        for doc in (out, tpl):
+            if doc is not None and not doc.is_closed:
+                doc.close()
+    return written
 
-    # skopíruj všetky strany šablóny
-    out.insert_pdf(tpl)
+def write_fields(doc, fields: dict[str, str], layout: dict[str, FieldBox], font, first_page: int = 0) -> None:
+    """
+    Fills the layout boxes of one record (pages first_page + box.page) through one
+    TextWriter per page. font is a fitz.Font loaded once by the caller; every page
+    written with it references the same embedded font object.
+    """
+    import fitz
 
+    writers = {}
     for key, text in fields.items():
-        if key not in layout:
+        box = layout.get(key)
+        if box is None:
             continue
-        box = layout[key]
-        page = out[box.page]
+        tw = writers.get(box.page)
+        if tw is None:
+            tw = writers[box.page] = fitz.TextWriter(doc[first_page + box.page].rect)
         rect = fitz.Rect(box.x, box.y, box.x + box.w, box.y + box.h)
+        # overflowing text is truncated to the lines that fit the box (insert_textbox,
+        # used before, wrote nothing at all then and returned a negative value)
+        tw.fill_textbox(rect, text or "", font=font, fontsize=box.size, align=fitz.TEXT_ALIGN_LEFT)
+
+    for pno, tw in writers.items():
+        tw.write_text(doc[first_page + pno])
 
-        page.insert_textbox(
-            rect,
-            text or "",
-            fontsize=box.size,
-            fontname="CustomFont",
-            fontfile=str(font_path),
-            align=fitz.TEXT_ALIGN_LEFT,
-        )
+def build_template_base(template, whiteouts: dict[int, list]) -> fitz.Document:
+    """
+    One page per template page with the whiteout rectangles drawn once.
+    Pages shown from the base with show_pdf_page share a single Form XObject
+    per base page in the output document (PyMuPDF reuses it), so each further
+    page only adds its own overlay.
+    """
+    import fitz
 
-    out.save(str(out_pdf))
+    base = fitz.open()
+    for pno in range(template.page_count):
+        src = template[pno]
+        page = base.new_page(width=src.rect.width, height=src.rect.height)
+        page.show_pdf_page(page.rect, template, pno)
+        rects = whiteouts.get(pno, [])
+        if rects:
+            shape = page.new_shape()
+            for r in rects:
+                shape.draw_rect(r)
+            shape.finish(color=(1, 1, 1), fill=(1, 1, 1), width=0)
+            shape.commit()
+    return base
+
+def new_page_from_base(out, base, pno: int):
+    src = base[pno]
+    page = out.new_page(width=src.rect.width, height=src.rect.height)
+    page.show_pdf_page(page.rect, base, pno)
+    return page
+
+def write_texts(page, items) -> None:
+    """items: (x, y, text, fontsize) - written with a single shape commit per page"""
+    shape = page.new_shape()
+    for x, y, text, size in items:
+        shape.insert_text((x, y), text, fontsize=size, color=(0, 0, 0))
+    shape.commit()
 
 def make_debug_grid(template_pdf: Path, out_pdf: Path, step_mm: int = 10) -> None:
+    import fitz
+
     doc = fitz.open(str(template_pdf))
     for p in doc:
         w, h = p.rect.width, p.rect.height
@@ -1,38 +1,88 @@
 from __future__ import annotations
 from datetime import date
-from typing import Any
+from typing import Any, Tuple
 
+from instrumentation import count, timed
 from rates import (
+    LruCache,
     PerDiemResult,
     Money,
     pick_country_schedule,
-    pick_fx_rate,
+    pick_fx_schedule,
 )
+from sk_per_diem import compute_sk_per_diem_cents
+from trip_model import DayResult, TripDay, cents
 
-def _percent_for_hours(bands, hours: float) -> float:
-    for b in bands:
+# (rates fingerprint, schedule, currency, band index, fx schedule) -> (orig cents, currency,
+# eur cents, PerDiemResult): all days priced by the same schedule, band and FX rate share
+# one entry. Schedules are frozen dataclasses, so the key is by value (daily FX history
+# builds them per lookup). The fingerprint keeps bundles apart (band indexes differ
+# between rate sets), so alternating between bundles keeps both sets of entries; rates
+# without a fingerprint (plain load_rates() dicts) are bound instead (cleared on change).
+FOREIGN_RESULT_CACHE = LruCache(maxsize=4096)
+
+def _band_index(bands, hours: float) -> int:
+    for i, b in enumerate(bands):
         if b["min"] <= hours < b["max"]:
-            return b["percent"]
-    return 0.0
+            return i
+    return -1
 
-def compute_foreign_per_diem_for_day(rates: Any, country: str, day: date, hours: float) -> PerDiemResult:
-    """
-    Computes foreign per diem for a single day segment.
-    - rates: output of load_rates()
-    - country: country code (CZ, PL, DE, AT, UK, ...)
-    - day: date
-    - hours: number of hours in that country on that day
-    """
+def _priced(rates: Any, country: str, day: date, hours: float):
+    """(orig cents, currency, eur cents, PerDiemResult) - memoized, rounded once per cache entry"""
+    count("lookups")
     # pick country schedule (foreign only; SK is handled elsewhere)
     sched, currency = pick_country_schedule(rates, country, day)
+    bands = rates["foreign_bands"]
+    band = _band_index(bands, hours)
+    fx_sched = pick_fx_schedule(rates, currency, day)
+
+    cache = FOREIGN_RESULT_CACHE
+    fingerprint = getattr(rates, "fingerprint", None) or None
+    if fingerprint is None:
+        cache.bind(rates)
+    key = (fingerprint, sched, currency, band, fx_sched)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
 
-    percent = _percent_for_hours(rates["foreign_bands"], hours)
+    percent = bands[band]["percent"] if band >= 0 else 0.0
     original_amount = round(sched.daily_base * (percent / 100.0), 2)
 
-    fx_rate = pick_fx_rate(rates, currency, day)
+    fx_rate = 1.0 if fx_sched is None else fx_sched.rate
     eur_amount = round(original_amount * fx_rate, 2)
 
-    return PerDiemResult(
+    result = PerDiemResult(
         original=Money(amount=original_amount, currency=currency),
         eur=Money(amount=eur_amount, currency="EUR"),
     )
+    priced = (cents(original_amount), currency, cents(eur_amount), result)
+    cache.put(key, priced)
+    return priced
+
+
+@timed("per_diem.foreign")
+def compute_foreign_per_diem_for_day(rates: Any, country: str, day: date, hours: float) -> PerDiemResult:
+    """
+    Computes foreign per diem for a single day segment.
+    - rates: output of load_rates() or a RatesBundle
+    - country: country code (CZ, PL, DE, AT, UK, ...)
+    - day: date
+    - hours: number of hours in that country on that day
+    """
+    return _priced(rates, country, day, hours)[3]
+
+
+@timed("per_diem.foreign")
+def compute_foreign_per_diem_cents(rates: Any, country: str, day: date, hours: float) -> Tuple[int, str, int]:
+    """Same as compute_foreign_per_diem_for_day as (orig cents, currency, eur cents)."""
+    orig, currency, eur, _ = _priced(rates, country, day, hours)
+    return orig, currency, eur
+
+
+def price_day(rates: Any, td: TripDay) -> DayResult:
+    """TripDay -> DayResult; SK days use the domestic bands (rates must carry sk_schedules)."""
+    if td.country == "SK":
+        c = compute_sk_per_diem_cents(rates["sk_schedules"], td.day, td.hours)
+        return DayResult(td.country, td.day, td.hours, c, "EUR", c)
+    orig, currency, eur = compute_foreign_per_diem_cents(rates, td.country, td.day, td.hours)
+    return DayResult(td.country, td.day, td.hours, orig, currency, eur)
@@ -0,0 +1,223 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+# Columnar counterpart of compute_foreign_per_diem_for_day / compute_sk_per_diem_for_day.
+# Inputs are whole columns (country code, date, hours) of trip-days; lookups are
+# np.searchsorted over band edges and effective-date arrays, grouped per code.
+
+
+@dataclass(frozen=True)
+class PerDiemBatch:
+    amount: np.ndarray    # original amount, float64, rounded to cents
+    currency: np.ndarray  # object array of currency codes
+    eur: np.ndarray       # EUR amount, float64, rounded to cents
+
+
+@dataclass(frozen=True)
+class _CompiledRates:
+    band_min: np.ndarray
+    band_max: np.ndarray
+    band_percent: np.ndarray
+    # code -> (effective dates, daily bases, currency)
+    countries: Dict[str, Tuple[np.ndarray, np.ndarray, str]]
+    # currency -> (effective dates, rates)
+    fx: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    # SK: effective dates + per schedule (band mins, band maxs, band amounts)
+    sk_dates: np.ndarray
+    sk_bands: Tuple[Tuple[np.ndarray, np.ndarray, np.ndarray], ...]
+
+
+# (rates object, compiled) - rates are compiled once and reused while the same object is passed
+_compiled_for: Tuple[Any, _CompiledRates] | None = None
+
+
+def _dates(scheds) -> np.ndarray:
+    return np.array([s.effective_from for s in scheds], dtype="datetime64[D]")
+
+
+_EPOCH_ORD = date(1970, 1, 1).toordinal()
+
+
+def _merge_history(history, cur: str, yaml_fx) -> Tuple[np.ndarray, np.ndarray]:
+    """FxHistory.timeline as (dates, rates); NaN rate = no FX after the history ends."""
+    ords, rates = history.timeline(cur, yaml_fx.schedules if yaml_fx is not None else ())
+    dates = (np.frombuffer(ords, dtype=np.int32).astype(np.int64) - _EPOCH_ORD).astype("datetime64[D]")
+    return dates, np.frombuffer(rates, dtype=np.float64).copy()
+
+
+def _compile(rates) -> _CompiledRates:
+    global _compiled_for
+    if _compiled_for is not None and _compiled_for[0] is rates:
+        return _compiled_for[1]
+
+    bands = sorted(rates["foreign_bands"], key=lambda b: b["min"])
+    countries = {}
+    for code, cr in rates["countries"].items():
+        scheds = sorted(cr.schedules, key=lambda x: x.effective_from)
+        countries[code] = (_dates(scheds), np.array([s.daily_base for s in scheds], dtype=float), cr.currency)
+    fx = {}
+    for cur, fxr in rates["fx"].items():
+        scheds = sorted(fxr.schedules, key=lambda x: x.effective_from)
+        fx[cur] = (_dates(scheds), np.array([s.rate for s in scheds], dtype=float))
+    history = rates.get("fx_history")
+    if history is not None:
+        for cur in history.currencies():
+            fx[cur] = _merge_history(history, cur, rates["fx"].get(cur))
+
+    sk = rates.get("sk_schedules") or ()
+    sk_bands = tuple(
+        (
+            np.array([b.min_hours_inclusive for b in s.bands], dtype=float),
+            np.array([b.max_hours_exclusive for b in s.bands], dtype=float),
+            np.array([round(b.amount, 2) for b in s.bands], dtype=float),
+        )
+        for s in sk
+    )
+
+    compiled = _CompiledRates(
+        band_min=np.array([b["min"] for b in bands], dtype=float),
+        band_max=np.array([b["max"] for b in bands], dtype=float),
+        band_percent=np.array([b["percent"] for b in bands], dtype=float),
+        countries=countries,
+        fx=fx,
+        sk_dates=_dates(sk),
+        sk_bands=sk_bands,
+    )
+    _compiled_for = (rates, compiled)
+    return compiled
+
+
+def _round_cents(values: np.ndarray) -> np.ndarray:
+    # Python round() on each distinct value -> identical cents to the scalar path
+    # (np.round scales by 100 first and can differ on half-cent edge cases).
+    uniq, inv = np.unique(values, return_inverse=True)
+    return np.array([round(float(v), 2) for v in uniq], dtype=float)[inv]
+
+
+def _pick_index(eff_dates: np.ndarray, days: np.ndarray) -> np.ndarray:
+    idx = np.searchsorted(eff_dates, days, side="right") - 1
+    if idx.size and idx.min() < 0:
+        raise ValueError(f"No schedule valid for date {days[idx < 0][0]}")
+    return idx
+
+
+def _band_lookup(mins: np.ndarray, maxs: np.ndarray, values: np.ndarray, hours: np.ndarray):
+    """Value of the band with min <= hours < max, plus a matched mask."""
+    if not len(mins):
+        return np.zeros(hours.shape), np.zeros(hours.shape, dtype=bool)
+    bi = np.searchsorted(mins, hours, side="right") - 1
+    safe = np.clip(bi, 0, None)
+    matched = (bi >= 0) & (hours < maxs[safe])
+    return np.where(matched, values[safe], 0.0), matched
+
+
+def _as_columns(countries: Sequence[str], days: Sequence[Any], hours: Sequence[float]):
+    codes = np.asarray(countries, dtype=object)
+    day_arr = np.asarray(days, dtype="datetime64[D]")
+    hrs = np.asarray(hours, dtype=float)
+    if not (codes.shape == day_arr.shape == hrs.shape):
+        raise ValueError("countries, days and hours must have the same length")
+    return codes, day_arr, hrs
+
+
+# -----------------------------
+# Foreign
+# -----------------------------
+
+def compute_foreign_per_diem_batch(rates, countries, days, hours) -> PerDiemBatch:
+    codes, day_arr, hrs = _as_columns(countries, days, hours)
+    c = _compile(rates)
+    n = hrs.size
+
+    base = np.empty(n, dtype=float)
+    currency = np.empty(n, dtype=object)
+    uniq_codes, inv = np.unique(codes, return_inverse=True)
+    for i, code in enumerate(uniq_codes):
+        code_u = str(code).upper()
+        if code_u not in c.countries:
+            raise ValueError(f"Unknown country code: {code_u}")
+        eff, bases, cur = c.countries[code_u]
+        mask = inv == i
+        base[mask] = bases[_pick_index(eff, day_arr[mask])]
+        currency[mask] = cur
+
+    percent, _ = _band_lookup(c.band_min, c.band_max, c.band_percent, hrs)
+    amount = _round_cents(base * (percent / 100.0))
+
+    fx_rate = np.ones(n, dtype=float)
+    for cur in np.unique(currency):
+        cur_u = str(cur).upper()
+        if cur_u == "EUR":
+            continue
+        if cur_u not in c.fx:
+            raise ValueError(f"No FX for currency {cur_u}")
+        eff, fx_rates = c.fx[cur_u]
+        mask = currency == cur
+        picked = fx_rates[_pick_index(eff, day_arr[mask])]
+        if np.isnan(picked).any():
+            raise ValueError(f"No FX for currency {cur_u}")
+        fx_rate[mask] = picked
+
+    eur = _round_cents(amount * fx_rate)
+    return PerDiemBatch(amount=amount, currency=currency, eur=eur)
+
+
+# -----------------------------
+# SK
+# -----------------------------
+
+def compute_sk_per_diem_batch(rates, days, hours) -> np.ndarray:
+    """EUR amounts for domestic trip-days; rates must carry sk_schedules (RatesBundle)."""
+    day_arr = np.asarray(days, dtype="datetime64[D]")
+    hrs = np.asarray(hours, dtype=float)
+    c = _compile(rates)
+
+    out = np.zeros(hrs.size, dtype=float)
+    todo = ~(hrs < 5)
+    if not todo.any():
+        return out
+    if not c.sk_bands:
+        raise ValueError("No SK schedule valid for date")
+
+    sched_idx = np.full(hrs.size, -1)
+    sched_idx[todo] = np.searchsorted(c.sk_dates, day_arr[todo], side="right") - 1
+    if (sched_idx[todo] < 0).any():
+        raise ValueError("No SK schedule valid for date")
+
+    for si in np.unique(sched_idx[todo]):
+        mins, maxs, amounts = c.sk_bands[si]
+        mask = todo & (sched_idx == si)
+        vals, matched = _band_lookup(mins, maxs, amounts, hrs[mask])
+        if not matched.all():
+            raise ValueError("No SK band matched")
+        out[mask] = vals
+    return out
+
+
+# -----------------------------
+# Mixed (export dispatch: SK -> SK engine, else foreign)
+# -----------------------------
+
+def compute_per_diem_batch(rates, countries, days, hours) -> PerDiemBatch:
+    codes, day_arr, hrs = _as_columns(countries, days, hours)
+    n = hrs.size
+    amount = np.zeros(n, dtype=float)
+    currency = np.full(n, "EUR", dtype=object)
+    eur = np.zeros(n, dtype=float)
+
+    is_sk = codes == "SK"
+    if is_sk.any():
+        sk = compute_sk_per_diem_batch(rates, day_arr[is_sk], hrs[is_sk])
+        amount[is_sk] = sk
+        eur[is_sk] = sk
+    foreign = ~is_sk
+    if foreign.any():
+        res = compute_foreign_per_diem_batch(rates, codes[foreign], day_arr[foreign], hrs[foreign])
+        amount[foreign] = res.amount
+        currency[foreign] = res.currency
+        eur[foreign] = res.eur
+    return PerDiemBatch(amount=amount, currency=currency, eur=eur)
@@ -0,0 +1,323 @@
+from __future__ import annotations
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import suppress
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Collection, Dict, List, Optional, Sequence, Tuple, Union
+
+from export_all import price_trip
+from import_excel import iter_sheets_trips
+from instrumentation import METRICS
+from trip_model import DayTable
+
+# Pipelined settlement: the stages run concurrently and hand batches of trips
+# over bounded queues, so reading the workbook, pricing and writing overlap.
+#
+#   read  (thread)                openpyxl streaming, batch_size trips per batch
+#     -> price (thread | processes) segmentation + per diem -> DayTable per batch
+#     -> sinks (one thread each)  RowsSink (XLSX/CSV/Parquet/ledger), PdfSink
+#
+#   with RowWriters(xlsx="out.xlsx") as w:
+#       stats = run_pipeline([("Sluzobne cesty.xlsx", ["September 2025"], False)], rates, [RowsSink(w)])
+#
+# Backpressure: a full queue blocks its producer, so a slow sink holds back
+# pricing and reading; at most about queue_size batches wait per queue.
+# Batches keep their order -> output identical to the sequential run.
+
+# (workbook, sheets, sheets to skip without the required columns - True: any)
+Source = Tuple[str, List[str], Union[bool, Collection[str]]]
+
+
+class StageStats:
+    """
+    Per-stage counters: busy = time spent working, starved = waiting for input,
+    blocked = waiting for room downstream (backpressure).
+    """
+    __slots__ = ("name", "items", "batches", "busy", "starved", "blocked")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+
+    @property
+    def items_per_sec(self) -> Optional[float]:
+        return self.items / self.busy if self.busy else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        rate = self.items_per_sec
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "busy_seconds": round(self.busy, 6),
+            "starved_seconds": round(self.starved, 6),
+            "blocked_seconds": round(self.blocked, 6),
+            "items_per_sec": None if rate is None else round(rate, 1),
+        }
+
+
+def format_stats(stats: Dict[str, StageStats]) -> str:
+    lines = [f"{'stage':<12} {'items':>9} {'busy s':>9} {'starved s':>10} {'blocked s':>10} {'items/s':>10}"]
+    for s in stats.values():
+        rate = s.items_per_sec
+        lines.append(f"{s.name:<12} {s.items:>9} {s.busy:>9.3f} {s.starved:>10.3f} {s.blocked:>10.3f} "
+                     f"{'' if rate is None else f'{rate:,.0f}':>10}")
+    return "\n".join(lines)
+
+
+# -----------------------------
+# Sinks
+# -----------------------------
+
+class RowsSink:
+    """Export rows of every priced batch into a RowWriters (closed by its owner)."""
+    name = "rows"
+
+    def __init__(self, writers):
+        self.writers = writers
+
+    def write(self, trips, table: DayTable) -> int:
+        for row in table.iter_rows():
+            self.writers.write(row)
+        return len(trips)
+
+    def close(self) -> None:
+        pass
+
+    def abort(self) -> None:
+        pass  # the owner's RowWriters discards the outputs
+
+
+class PdfSink:
+    """
+    Appends the pages of every trip to one PDF saved on close; abort() (a failed run)
+    closes the documents without saving.
+    build_base(tpl) -> base document, render(out, base, trip, total_eur) -> pages of one trip
+    (the accountant script's build_base / render_trip).
+    """
+    name = "pdf"
+
+    def __init__(self, template_pdf: str | Path, out_pdf: str | Path, build_base: Callable, render: Callable):
+        import fitz
+
+        self.out_pdf = Path(out_pdf)
+        self.render = render
+        self._tpl = fitz.open(str(template_pdf))
+        self._base = self._out = None
+        try:
+            self._base = build_base(self._tpl)
+            self._out = fitz.open()
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, trips, table: DayTable) -> int:
+        for (_, t), cents in zip(trips, table.trip_totals()):
+            self.render(self._out, self._base, t, cents / 100)
+        return len(trips)
+
+    def close(self) -> None:
+        try:
+            self._out.save(str(self.out_pdf))
+        finally:
+            self.abort()
+
+    def abort(self) -> None:
+        for doc in (self._out, self._base, self._tpl):
+            if doc is not None and not doc.is_closed:
+                doc.close()
+
+
+# -----------------------------
+# Pricing (thread or worker process)
+# -----------------------------
+
+_worker_rates = None
+
+
+def _init_worker(rates) -> None:
+    global _worker_rates
+    _worker_rates = rates
+
+
+def _price_batch(workbook: str, trips, rates=None) -> Tuple[DayTable, float]:
+    """trips: [(trip_id, trip)] -> (DayTable tagged with workbook/sheet, seconds spent)"""
+    t0 = time.perf_counter()
+    rates = rates if rates is not None else _worker_rates
+    table = DayTable()
+    for trip_id, t in trips:
+        table.add_trip(trip_id, t.get("purpose", ""), price_trip(t, rates), workbook=workbook, sheet=t["sheet"])
+    return table, time.perf_counter() - t0
+
+
+# -----------------------------
+# Runner
+# -----------------------------
+
+_DONE = object()
+
+
+class _Stopped(Exception):
+    """another stage failed; unwind quietly"""
+
+
+class _Run:
+    def __init__(self):
+        self.stop = threading.Event()
+        self.error: Optional[BaseException] = None
+
+    def fail(self, e: BaseException) -> None:
+        if self.error is None:
+            self.error = e
+        self.stop.set()
+
+    def put(self, q: queue.Queue, item, stats: StageStats) -> None:
+        t0 = time.perf_counter()
+        while True:
+            try:
+                q.put(item, timeout=0.05)
+                break
+            except queue.Full:
+                if self.stop.is_set():
+                    raise _Stopped from None
+        stats.blocked += time.perf_counter() - t0
+
+    def get(self, q: queue.Queue, stats: StageStats):
+        t0 = time.perf_counter()
+        while True:
+            try:
+                item = q.get(timeout=0.05)
+                break
+            except queue.Empty:
+                if self.stop.is_set():
+                    raise _Stopped from None
+        stats.starved += time.perf_counter() - t0
+        return item
+
+    def thread(self, name: str, fn: Callable, *args) -> threading.Thread:
+        def target():
+            try:
+                fn(*args)
+            except _Stopped:
+                pass
+            except BaseException as e:  # surfaced by run_pipeline
+                self.fail(e)
+
+        th = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+        th.start()
+        return th
+
+
+def run_pipeline(sources: Sequence[Source], rates, sinks: Sequence[Any], workers: int = 1,
+                 batch_size: int = 200, queue_size: int = 4) -> Dict[str, StageStats]:
+    """
+    Reads, prices and writes the trips of sources (trip_id per sheet, as in settle)
+    with the stages overlapping. sinks: RowsSink / PdfSink-like objects (unique name
+    other than read/price, write(trips, table) -> items, close(), abort()); each gets
+    every batch in order. When a stage fails, the sinks not closed yet are aborted.
+    workers > 1: batches are priced in a process pool, up to 2 * workers in flight.
+    Returns the stage stats (read, price, then one per sink); also recorded in
+    METRICS as pipeline.<stage> when it is enabled.
+    """
+    names = ["read", "price"] + [s.name for s in sinks]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Sink names must be unique and not read/price: {names[2:]}")
+    run = _Run()
+    stats = {name: StageStats(name) for name in names}
+    closed = set()
+    trips_q: queue.Queue = queue.Queue(maxsize=queue_size)
+    sink_qs = [queue.Queue(maxsize=queue_size) for _ in sinks]
+
+    def read():
+        st = stats["read"]
+        for workbook, sheets, skip_incomplete in sources:
+            trip_ids: Dict[str, int] = {}
+            batch = []
+            t0 = time.perf_counter()
+            for t in iter_sheets_trips(workbook, sheets, skip_incomplete):
+                trip_ids[t["sheet"]] = trip_ids.get(t["sheet"], 0) + 1
+                batch.append((trip_ids[t["sheet"]], t))
+                if len(batch) == batch_size:
+                    st.busy += time.perf_counter() - t0
+                    st.items += len(batch)
+                    st.batches += 1
+                    run.put(trips_q, (workbook, batch), st)
+                    batch = []
+                    t0 = time.perf_counter()
+            st.busy += time.perf_counter() - t0
+            if batch:
+                st.items += len(batch)
+                st.batches += 1
+                run.put(trips_q, (workbook, batch), st)
+        run.put(trips_q, _DONE, st)
+
+    def emit(trips, table: DayTable) -> None:
+        st = stats["price"]
+        st.items += len(trips)
+        st.batches += 1
+        for q in sink_qs:
+            run.put(q, (trips, table), st)
+
+    def price():
+        st = stats["price"]
+        if workers <= 1:
+            while (item := run.get(trips_q, st)) is not _DONE:
+                table, seconds = _price_batch(item[0], item[1], rates)
+                st.busy += seconds
+                emit(item[1], table)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rates,)) as pool:
+                pending: deque = deque()
+                item = None
+                while item is not _DONE or pending:
+                    if item is not _DONE and len(pending) < 2 * workers:
+                        item = run.get(trips_q, st)
+                        if item is not _DONE:
+                            pending.append((item[1], pool.submit(_price_batch, item[0], item[1])))
+                        continue
+                    trips, fut = pending.popleft()  # oldest first -> batch order kept
+                    table, seconds = fut.result()
+                    st.busy += seconds
+                    emit(trips, table)
+        for q in sink_qs:
+            run.put(q, _DONE, st)
+
+    def write(sink, q: queue.Queue):
+        st = stats[sink.name]
+        while (item := run.get(q, st)) is not _DONE:
+            t0 = time.perf_counter()
+            st.items += sink.write(*item)
+            st.batches += 1
+            st.busy += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        closed.add(sink.name)  # close() cleans up after itself, also when it fails
+        sink.close()
+        st.busy += time.perf_counter() - t0
+
+    threads = [run.thread("read", read), run.thread("price", price)]
+    threads += [run.thread(s.name, write, s, q) for s, q in zip(sinks, sink_qs)]
+    try:
+        for th in threads:
+            th.join()
+    except KeyboardInterrupt:
+        run.fail(KeyboardInterrupt())
+        for th in threads:
+            th.join()
+    if run.error is not None:
+        for sink in sinks:
+            if sink.name not in closed:
+                with suppress(Exception):
+                    sink.abort()
+        raise run.error
+
+    if METRICS.enabled:
+        for s in stats.values():
+            METRICS.add_time(f"pipeline.{s.name}", s.busy, s.batches)
+            METRICS.count(f"pipeline.{s.name}.items", s.items)
+    return stats
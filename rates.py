@@ -1,9 +1,16 @@
 from __future__ import annotations
+import csv
+import hashlib
+import math
+import os
+import pickle
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import date
 from pathlib import Path
-from typing import Dict, Any, List, Tuple
-import yaml
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
 
 # -----------------------------
 # Data models
@@ -61,13 +68,288 @@ def pick_schedule_by_date(schedules, on_date: date):
     return valid[-1]
 
 
+class RateTable:
+    """
+    Compiled effective-date index over schedules, keyed by country/currency code.
+    Built once by the loaders; pick() is O(log n) via bisect instead of
+    filtering + sorting the schedule list on every call.
+    """
+
+    __slots__ = ("_dates", "_schedules")
+
+    def __init__(self, schedules_by_code: Dict[str, Sequence[Any]]):
+        self._dates: Dict[str, List[date]] = {}
+        self._schedules: Dict[str, List[Any]] = {}
+        for code, scheds in schedules_by_code.items():
+            ordered = sorted(scheds, key=lambda x: x.effective_from)
+            self._schedules[code.upper()] = ordered
+            self._dates[code.upper()] = [s.effective_from for s in ordered]
+
+    def __contains__(self, code: str) -> bool:
+        return code.upper() in self._dates
+
+    def codes(self) -> List[str]:
+        return list(self._dates)
+
+    def schedules(self, code: str) -> List[Any]:
+        return self._schedules[code.upper()]
+
+    def pick(self, code: str, on_date: date):
+        code = code.upper()
+        dates = self._dates.get(code)
+        if dates is None:
+            raise ValueError(f"Unknown code: {code}")
+        i = bisect_right(dates, on_date)
+        if i == 0:
+            raise ValueError(f"No schedule valid for date {on_date}")
+        return self._schedules[code][i - 1]
+
+    def lookup(self, codes: Iterable[str], dates: Iterable[date]) -> List[Any]:
+        """Batch pick(): one schedule per (code, date) pair, in input order."""
+        all_dates = self._dates
+        all_scheds = self._schedules
+        out = []
+        for code, on_date in zip(codes, dates):
+            code = code.upper()
+            ds = all_dates.get(code)
+            if ds is None:
+                raise ValueError(f"Unknown code: {code}")
+            i = bisect_right(ds, on_date)
+            if i == 0:
+                raise ValueError(f"No schedule valid for date {on_date}")
+            out.append(all_scheds[code][i - 1])
+        return out
+
+
+class LruCache:
+    """
+    Bounded LRU with hit/miss counters for memoized per-day results.
+    Keys carry what the result depends on (e.g. the bundle fingerprint); for rates
+    without one, bind(owner) clears the cache whenever a different object is used,
+    so results never outlive the rates they came from.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._owner: Any = None
+
+    def bind(self, owner: Any) -> None:
+        if owner is not self._owner:
+            self._data.clear()
+            self._owner = owner
+
+    def get(self, key):
+        value = self._data.get(key, self._MISSING)
+        if value is self._MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key, value) -> None:
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._owner = None
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "maxsize": self.maxsize}
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """temp file + rename: readers never see a half-written cache or stamp"""
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class FxHistory:
+    """
+    Daily FX history imported from a local ECB reference-rate CSV
+    (eurofxref-hist.csv layout: Date,USD,JPY,...; values are units per 1 EUR, N/A when missing).
+    Per currency two compact arrays: date ordinals ('i') and rates to EUR ('d'), ascending.
+    pick() bisects them -> O(log n); days without a fixing (weekends, holidays)
+    fall back to the previous business day. The history stops applying FALLBACK_DAYS
+    after the last fixing, or earlier where rates.yml has a newer schedule (bounded()),
+    so an outdated CSV never outvotes rates.yml.
+    """
+
+    CACHE_VERSION = 1
+    FALLBACK_DAYS = 4  # Easter: Thursday's fixing covers Friday..Monday
+
+    def __init__(self, series: Dict[str, Tuple[array, array]], digest: str = "",
+                 stops: Optional[Dict[str, int]] = None):
+        self._series = series
+        self.digest = digest  # sha256 of the source CSV
+        # currency -> first ordinal the history no longer covers
+        self._stops = {cur: o[-1] + self.FALLBACK_DAYS + 1 for cur, (o, _) in series.items()}
+        self._stops.update(stops or {})
+
+    def __contains__(self, currency: str) -> bool:
+        return currency.upper() in self._series
+
+    def currencies(self) -> List[str]:
+        return list(self._series)
+
+    def series(self, currency: str) -> Tuple[array, array]:
+        return self._series[currency.upper()]
+
+    def first_date(self, currency: str) -> date:
+        return date.fromordinal(self._series[currency.upper()][0][0])
+
+    def stop(self, currency: str) -> int:
+        return self._stops[currency.upper()]
+
+    def bounded(self, fx: Dict[str, "FxRates"]) -> "FxHistory":
+        """Copy whose currencies stop at the first rates.yml schedule dated after their last fixing."""
+        stops = {}
+        for cur, (ords, _) in self._series.items():
+            newer = [s.effective_from.toordinal() for s in fx[cur].schedules
+                     if s.effective_from.toordinal() > ords[-1]] if cur in fx else []
+            if newer:
+                stops[cur] = min(self._stops[cur], min(newer))
+        return FxHistory(self._series, self.digest, stops)
+
+    def pick(self, currency: str, on_date: date) -> Optional[FxSchedule]:
+        """Fixing valid on the date as an FxSchedule; None outside the history (before or after)."""
+        currency = currency.upper()
+        ords, rates = self._series[currency]
+        o = on_date.toordinal()
+        if o >= self._stops[currency]:
+            return None
+        i = bisect_right(ords, o)
+        if i == 0:
+            return None
+        return FxSchedule(effective_from=date.fromordinal(ords[i - 1]), rate=rates[i - 1])
+
+    def timeline(self, currency: str, yaml_schedules: Sequence["FxSchedule"] = ()) -> Tuple[array, array]:
+        """
+        Effective-date points (ordinals, rates) as pick_fx_schedule resolves them: rates.yml
+        schedules before the first fixing, the fixings, rates.yml again from stop() on
+        (NaN where no rates.yml schedule is valid yet).
+        """
+        ords, rates = self.series(currency)
+        stop = self.stop(currency)
+        yaml = sorted(yaml_schedules, key=lambda x: x.effective_from)
+        out_o, out_r = array("i"), array("d")
+        for s in yaml:
+            if s.effective_from.toordinal() < ords[0]:
+                out_o.append(s.effective_from.toordinal())
+                out_r.append(s.rate)
+        out_o.extend(ords)
+        out_r.extend(rates)
+        valid = [s for s in yaml if s.effective_from.toordinal() <= stop]
+        out_o.append(stop)
+        out_r.append(valid[-1].rate if valid else math.nan)
+        for s in yaml:
+            if s.effective_from.toordinal() > stop:
+                out_o.append(s.effective_from.toordinal())
+                out_r.append(s.rate)
+        return out_o, out_r
+
+    @classmethod
+    def from_ecb_csv(cls, path: str | Path) -> "FxHistory":
+        raw = Path(path).read_bytes()
+        rows = csv.reader(raw.decode("utf-8-sig").splitlines())
+        header = [h.strip().upper() for h in next(rows)]
+        points: Dict[str, List[Tuple[int, float]]] = {h: [] for h in header[1:] if h}
+        for row in rows:
+            if not row or not row[0].strip():
+                continue
+            ordinal = parse_date(row[0].strip()).toordinal()
+            for cur, v in zip(header[1:], row[1:]):
+                v = v.strip()
+                if not cur or not v or v == "N/A":
+                    continue
+                points[cur].append((ordinal, 1.0 / float(v)))  # ECB: units per EUR -> EUR per unit
+
+        series = {}
+        for cur, pts in points.items():
+            if not pts:
+                continue
+            pts.sort()
+            series[cur] = (array("i", [p[0] for p in pts]), array("d", [p[1] for p in pts]))
+        return cls(series, digest=hashlib.sha256(raw).hexdigest())
+
+    def save(self, path: str | Path) -> None:
+        payload = {
+            "version": self.CACHE_VERSION,
+            "digest": self.digest,
+            "series": {cur: (o.tobytes(), r.tobytes()) for cur, (o, r) in self._series.items()},
+        }
+        write_atomic(Path(path), pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @classmethod
+    def load(cls, path: str | Path) -> Optional["FxHistory"]:
+        payload = pickle.loads(Path(path).read_bytes())
+        if payload.get("version") != cls.CACHE_VERSION:
+            return None
+        series = {}
+        for cur, (o, r) in payload["series"].items():
+            ords, rates = array("i"), array("d")
+            ords.frombytes(o)
+            rates.frombytes(r)
+            series[cur] = (ords, rates)
+        return cls(series, digest=payload["digest"])
+
+    @classmethod
+    def load_cached(cls, csv_path: str | Path, cache_path: str | Path | None = None) -> "FxHistory":
+        """CSV import with a binary cache next to it, rebuilt when the CSV mtime/size changes."""
+        csv_path = Path(csv_path)
+        cache_path = Path(cache_path) if cache_path else csv_path.with_name(csv_path.name + ".fxcache")
+        st = csv_path.stat()
+        stamp = f"{st.st_mtime_ns}:{st.st_size}"
+        stamp_path = cache_path.with_name(cache_path.name + ".stamp")
+
+        if cache_path.exists() and stamp_path.exists() and stamp_path.read_text() == stamp:
+            hist = cls.load(cache_path)
+            if hist is not None:
+                return hist
+        hist = cls.from_ecb_csv(csv_path)
+        hist.save(cache_path)
+        write_atomic(stamp_path, stamp.encode())
+        return hist
+
+
 # -----------------------------
 # Loaders
 # -----------------------------
 
 def load_rates(path: str | Path):
-    data: Dict[str, Any] = yaml.safe_load(Path(path).read_text(encoding="utf-8"))
+    import yaml
 
+    data: Dict[str, Any] = yaml.safe_load(Path(path).read_text(encoding="utf-8"))
+    return build_foreign_rates(data, base_dir=Path(path).parent)
+
+
+def load_fx_history(data: Dict[str, Any], base_dir: str | Path | None = None) -> Optional[FxHistory]:
+    """
+    Optional daily FX history configured in rates.yml:
+      fx_history:
+        ecb_csv: eurofxref-hist.csv   # relative to rates.yml
+        cache: eurofxref-hist.fxcache # optional
+    """
+    cfg = data.get("fx_history")
+    if not cfg:
+        return None
+    base = Path(base_dir) if base_dir is not None else Path(".")
+    cache = cfg.get("cache")
+    return FxHistory.load_cached(base / cfg["ecb_csv"], base / cache if cache else None)
+
+
+def build_foreign_rates(data: Dict[str, Any], base_dir: str | Path | None = None):
+    """Foreign part of an already parsed rates.yml (see rates_bundle for the shared loader)."""
     # foreign time bands (percent of daily base)
     bands = data["foreign_time_bands"]
     foreign_bands = []
@@ -113,10 +395,14 @@ def load_rates(path: str | Path):
         scheds.sort(key=lambda x: x.effective_from)
         fx[cur.upper()] = FxRates(schedules=scheds)
 
+    history = load_fx_history(data, base_dir)
     return {
         "foreign_bands": foreign_bands,
         "countries": countries,
         "fx": fx,
+        "country_table": RateTable({code: cr.schedules for code, cr in countries.items()}),
+        "fx_table": RateTable({cur: fxr.schedules for cur, fxr in fx.items()}),
+        "fx_history": history.bounded(fx) if history is not None else None,
     }
 
 
@@ -129,19 +415,39 @@ def pick_country_schedule(rates, code: str, on_date: date) -> Tuple[CountrySched
     if code not in rates["countries"]:
         raise ValueError(f"Unknown country code: {code}")
     cr: CountryRates = rates["countries"][code]
+    table = rates.get("country_table")
+    if table is not None:
+        return table.pick(code, on_date), cr.currency
     sched = pick_schedule_by_date(cr.schedules, on_date)
     return sched, cr.currency
 
 
-def pick_fx_rate(rates, currency: str, on_date: date) -> float:
+def pick_fx_schedule(rates, currency: str, on_date: date) -> FxSchedule | None:
+    """
+    FX schedule valid on the date; None for EUR (rate 1.0).
+    Daily history (fx_history) wins where it covers the date (FxHistory.pick), rates.yml
+    schedules otherwise - also after the history ends.
+    """
     currency = currency.upper()
     if currency == "EUR":
-        return 1.0
+        return None
+    history = rates.get("fx_history")
+    if history is not None and currency in history:
+        sched = history.pick(currency, on_date)
+        if sched is not None:
+            return sched
     if currency not in rates["fx"]:
         raise ValueError(f"No FX for currency {currency}")
+    table = rates.get("fx_table")
+    if table is not None:
+        return table.pick(currency, on_date)
     fxr: FxRates = rates["fx"][currency]
-    sched = pick_schedule_by_date(fxr.schedules, on_date)
-    return sched.rate
+    return pick_schedule_by_date(fxr.schedules, on_date)
+
+
+def pick_fx_rate(rates, currency: str, on_date: date) -> float:
+    sched = pick_fx_schedule(rates, currency, on_date)
+    return 1.0 if sched is None else sched.rate
 
 
 # -----------------------------
@@ -0,0 +1,199 @@
+from __future__ import annotations
+import hashlib
+import pickle
+from collections.abc import Mapping
+from dataclasses import dataclass, fields
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional, Tuple
+
+from rates import CountryRates, FxHistory, FxRates, RateTable, build_foreign_rates, write_atomic
+from sk_per_diem import SkSchedule, build_sk_schedules
+
+# Bump when RatesBundle layout changes -> old snapshots are ignored.
+SNAPSHOT_VERSION = 4
+
+# -----------------------------
+# Bundle
+# -----------------------------
+
+@dataclass(frozen=True, eq=False)
+class RatesBundle(Mapping):
+    """
+    Everything from one parse of rates.yml: foreign bands, country schedules,
+    FX and SK bands. Read-only; also usable wherever the load_rates() dict is
+    expected (rates["countries"], rates.get("fx_table"), ...).
+    """
+    foreign_bands: Tuple[Mapping[str, Any], ...]
+    countries: Mapping[str, CountryRates]
+    fx: Mapping[str, FxRates]
+    country_table: RateTable
+    fx_table: RateTable
+    sk_schedules: Tuple[SkSchedule, ...]
+    fx_history: Optional[FxHistory]
+    source: str
+    fingerprint: str  # sha256 of the rates.yml bytes (+ FX history CSV digest)
+
+    def __getitem__(self, key: str):
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(_FIELD_NAMES)
+
+    def __len__(self) -> int:
+        return len(_FIELD_NAMES)
+
+    def __reduce__(self):
+        # MappingProxyType cannot be pickled -> snapshot plain dicts
+        state = {
+            "foreign_bands": [dict(b) for b in self.foreign_bands],
+            "countries": dict(self.countries),
+            "fx": dict(self.fx),
+            "country_table": self.country_table,
+            "fx_table": self.fx_table,
+            "sk_schedules": list(self.sk_schedules),
+            "fx_history": self.fx_history,
+            "source": self.source,
+            "fingerprint": self.fingerprint,
+        }
+        return (_bundle_from_state, (state,))
+
+
+_FIELD_NAMES = tuple(f.name for f in fields(RatesBundle))
+
+
+def _bundle_from_state(state: Dict[str, Any]) -> RatesBundle:
+    return RatesBundle(
+        foreign_bands=tuple(MappingProxyType(dict(b)) for b in state["foreign_bands"]),
+        countries=MappingProxyType(dict(state["countries"])),
+        fx=MappingProxyType(dict(state["fx"])),
+        country_table=state["country_table"],
+        fx_table=state["fx_table"],
+        sk_schedules=tuple(state["sk_schedules"]),
+        fx_history=state.get("fx_history"),
+        source=state["source"],
+        fingerprint=state["fingerprint"],
+    )
+
+
+def build_rates_bundle(data: Dict[str, Any], source: str = "", fingerprint: str = "") -> RatesBundle:
+    foreign = build_foreign_rates(data, base_dir=Path(source).parent if source else None)
+    history = foreign["fx_history"]
+    if history is not None:
+        fingerprint = f"{fingerprint}+{history.digest}"
+    return _bundle_from_state({
+        **foreign,
+        "sk_schedules": build_sk_schedules(data),
+        "source": source,
+        "fingerprint": fingerprint,
+    })
+
+
+# -----------------------------
+# Loader (parse once, cache by path + mtime/hash)
+# -----------------------------
+
+# resolved path -> (files, stamp, sha256 of rates.yml, bundle); files are rates.yml
+# plus the FX history CSV it references, the stamp is their (mtime_ns, size)
+_CACHE: Dict[str, Tuple[List[Path], Tuple, str, RatesBundle]] = {}
+
+
+def _stamp(paths: List[Path]) -> Tuple:
+    return tuple((st.st_mtime_ns, st.st_size) for st in (p.stat() for p in paths))
+
+
+def _source_files(p: Path, data: Dict[str, Any]) -> List[Path]:
+    cfg = data.get("fx_history")
+    return [p, p.parent / cfg["ecb_csv"]] if cfg else [p]
+
+
+def load_rates_bundle(path: str | Path, snapshot: Optional[str | Path] = None) -> RatesBundle:
+    """
+    Parses rates.yml once and returns the shared RatesBundle.
+    - repeated calls with unchanged files (same mtime/size) return the cached bundle
+    - a touched but identical rates.yml (same sha256) keeps the cached bundle too,
+      as long as the FX history CSV is unchanged
+    - snapshot: optional pickle from save_rates_snapshot(); used instead of YAML
+      parsing when the sha256 of rates.yml and of its FX history CSV match the
+      files it was built from (checked before anything is parsed)
+    """
+    p = Path(path).resolve()
+
+    hit = _CACHE.get(str(p))
+    if hit is not None:
+        files, stamp, _, bundle = hit
+        current = _stamp(files)
+        if current == stamp:
+            return bundle
+
+    raw = p.read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    if hit is not None and hit[2] == digest and current[1:] == hit[1][1:]:
+        _CACHE[str(p)] = (hit[0], current, digest, hit[3])
+        return hit[3]
+
+    if snapshot is not None and Path(snapshot).exists():
+        payload = _read_snapshot(snapshot)
+        if payload is not None and _sources_match(payload["sources"], p, digest):
+            files = [Path(f) for f, _ in payload["sources"]]
+            _CACHE[str(p)] = (files, _stamp(files), digest, payload["bundle"])
+            return payload["bundle"]
+
+    import yaml
+
+    data: Dict[str, Any] = yaml.safe_load(raw.decode("utf-8"))
+    files = _source_files(p, data)
+    bundle = build_rates_bundle(data, source=str(p), fingerprint=digest)
+
+    _CACHE[str(p)] = (files, _stamp(files), digest, bundle)
+    return bundle
+
+
+def _sources_match(sources, p: Path, digest: str) -> bool:
+    """sources: [(path, sha256)] of the snapshot, rates.yml first"""
+    if not sources or sources[0] != (str(p), digest):
+        return False
+    for f, sha in sources[1:]:
+        try:
+            if hashlib.sha256(Path(f).read_bytes()).hexdigest() != sha:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def clear_rates_cache() -> None:
+    _CACHE.clear()
+
+
+# -----------------------------
+# Binary snapshot (for worker processes)
+# -----------------------------
+
+def save_rates_snapshot(bundle: RatesBundle, path: str | Path) -> None:
+    """
+    Records the files the bundle was built from (rates.yml + FX history CSV, with their
+    sha256) so load_rates_bundle can check them without parsing; bundles not loaded
+    through load_rates_bundle are stored without sources (never matched).
+    """
+    hit = _CACHE.get(bundle.source)
+    sources = []
+    if hit is not None and hit[3] is bundle:
+        sources = [(str(f), hashlib.sha256(f.read_bytes()).hexdigest()) for f in hit[0]]
+    payload = {"version": SNAPSHOT_VERSION, "bundle": bundle, "sources": sources}
+    write_atomic(Path(path), pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _read_snapshot(path: str | Path) -> Optional[Dict[str, Any]]:
+    payload = pickle.loads(Path(path).read_bytes())
+    if not isinstance(payload, dict) or payload.get("version") != SNAPSHOT_VERSION:
+        return None
+    return payload
+
+
+def load_rates_snapshot(path: str | Path) -> Optional[RatesBundle]:
+    """Returns None for snapshots written by an incompatible version."""
+    payload = _read_snapshot(path)
+    return None if payload is None else payload["bundle"]
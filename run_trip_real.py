@@ -1,17 +1,17 @@
 from datetime import timedelta
-from rates import load_rates
+from rates_bundle import load_rates_bundle
 from per_diem import compute_foreign_per_diem_for_day
-from sk_per_diem import load_sk_rates, compute_sk_per_diem_for_day
+from sk_per_diem import compute_sk_per_diem_for_day
 from compute_trip_segments import split_trip_into_country_segments, iter_days, hours_in_day
-from import_excel import load_trips
+from trip_cache import load_trips_cached
 
 RATES = "rates.yml"
 XLSX = "Sluzobne cesty.xlsx"
 SHEET = "September 2025"
 
-rates = load_rates(RATES)
-sk_schedules = load_sk_rates(RATES)
-trips = load_trips(XLSX, SHEET)
+rates = load_rates_bundle(RATES)
+sk_schedules = rates.sk_schedules
+trips = load_trips_cached(XLSX, SHEET)
 
 # vyber prvý zahraničný trip, aby si hneď videl výpočet
 t = next(x for x in trips if x["country"] != "SK")
@@ -0,0 +1,238 @@
+from __future__ import annotations
+import asyncio
+import json
+from datetime import datetime, time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from compute_trip_segments import iter_trip_days
+from per_diem import price_day
+from rates_bundle import RatesBundle, load_rates_bundle
+from trip_model import Trip
+
+# Local pricing service: rates stay loaded in one warm process, the HR tool
+# sends trips over HTTP instead of starting a script per request.
+#
+#   python cestovne.py serve --port 8765
+#   POST /price        {"country": "DE", "start": "2025-09-08T05:00", "end": "2025-09-10T22:00",
+#                       "crossings": [["AT", "06:30"], ["DE", "11:15"], ["SK", "2025-09-10T19:40"]]}
+#   POST /price/batch  {"trips": [<trip>, ...]} -> {"results": [...]} (errors per trip)
+#   GET  /health
+#
+# rates.yml is re-checked every reload_interval seconds (mtime/size, see
+# load_rates_bundle) and swapped in without a restart.
+
+MAX_BODY = 32 * 1024 * 1024
+
+
+class RatesHolder:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.rates: RatesBundle = load_rates_bundle(self.path)
+        self.reloads = 0
+
+    def refresh(self) -> bool:
+        """Picks up a changed rates.yml; a broken file keeps the previous rates."""
+        try:
+            rates = load_rates_bundle(self.path)
+        except Exception:
+            return False
+        if rates is self.rates:
+            return False
+        self.rates = rates
+        self.reloads += 1
+        return True
+
+
+# -----------------------------
+# Trip JSON -> priced days
+# -----------------------------
+
+def _time_or_datetime(v: str):
+    return datetime.fromisoformat(v) if "T" in v or " " in v.strip() else time.fromisoformat(v)
+
+
+def trip_from_json(d: Dict[str, Any]) -> Trip:
+    """
+    {"country", "start", "end" (ISO datetimes), optional "purpose", "border_out"/"border_in"
+    ("HH:MM") or "crossings" ([[country, "HH:MM" or ISO datetime], ...])}
+    """
+    try:
+        crossings = d.get("crossings")
+        return Trip(
+            country=str(d["country"]).strip().upper(),
+            start_dt=datetime.fromisoformat(d["start"]),
+            end_dt=datetime.fromisoformat(d["end"]),
+            purpose=d.get("purpose", "") or "",
+            border_out=time.fromisoformat(d["border_out"]) if d.get("border_out") else None,
+            border_in=time.fromisoformat(d["border_in"]) if d.get("border_in") else None,
+            crossings=[(str(c).upper(), _time_or_datetime(at)) for c, at in crossings] if crossings else None,
+        )
+    except KeyError as e:
+        raise ValueError(f"Missing field: {e.args[0]}") from None
+    except (TypeError, AttributeError):
+        raise ValueError("Invalid trip") from None
+
+
+def price_trip_json(rates, d: Dict[str, Any]) -> Dict[str, Any]:
+    days = [price_day(rates, td) for td in iter_trip_days(trip_from_json(d))]
+    return {
+        "days": [
+            {
+                "country": r.country,
+                "day": r.day.isoformat(),
+                "hours": round(r.hours, 2),
+                "orig_amount": r.orig_amount,
+                "orig_currency": r.currency,
+                "eur_amount": r.eur_amount,
+            }
+            for r in days
+        ],
+        "total_eur": sum(r.eur_cents for r in days) / 100,
+    }
+
+
+def price_batch(rates, trips: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    out = []
+    for d in trips:
+        try:
+            out.append(price_trip_json(rates, d))
+        except ValueError as e:
+            out.append({"error": str(e)})
+    return out
+
+
+# -----------------------------
+# HTTP (minimal HTTP/1.1, keep-alive)
+# -----------------------------
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+            500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class PricingService:
+    def __init__(self, rates_path: str | Path, reload_interval: float = 1.0):
+        self.holder = RatesHolder(rates_path)
+        self.reload_interval = reload_interval
+        self.requests = 0
+        self._watcher = None
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        rates = self.holder.rates
+        if path == "/health":
+            return 200, {"status": "ok", "rates": rates.fingerprint, "reloads": self.holder.reloads}
+        if path not in ("/price", "/price/batch"):
+            raise HttpError(404, f"Unknown path {path}")
+        if method != "POST":
+            raise HttpError(405, "Use POST")
+        try:
+            payload = json.loads(body or b"null")
+        except ValueError:
+            raise HttpError(400, "Invalid JSON") from None
+
+        if path == "/price":
+            if not isinstance(payload, dict):
+                raise HttpError(400, "Expected a trip object")
+            try:
+                return 200, price_trip_json(rates, payload)
+            except ValueError as e:
+                raise HttpError(400, str(e)) from None
+
+        trips = payload.get("trips") if isinstance(payload, dict) else None
+        if not isinstance(trips, list):
+            raise HttpError(400, "Expected {\"trips\": [...]}")
+        return 200, {"results": price_batch(rates, trips)}
+
+    async def _client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+
+                length = None  # unknown -> the body cannot be skipped, connection closed
+                try:
+                    try:
+                        length = int(headers.get("content-length", "0") or 0)
+                    except ValueError:
+                        raise HttpError(400, "Invalid Content-Length") from None
+                    if length < 0:
+                        length = None
+                        raise HttpError(400, "Invalid Content-Length")
+                    if length > MAX_BODY:
+                        raise HttpError(413, "Request too large")
+                    body = await reader.readexactly(length) if length else b""
+                    self.requests += 1
+                    # pricing is CPU-bound: off the event loop, other clients keep being served
+                    status, result = await asyncio.get_running_loop().run_in_executor(
+                        None, self.handle, method.upper(), target.split("?", 1)[0], body)
+                except HttpError as e:
+                    status, result = e.status, {"error": str(e)}
+                except Exception as e:  # keep serving; the caller gets the message
+                    status, result = 500, {"error": f"{type(e).__name__}: {e}"}
+
+                data = json.dumps(result, ensure_ascii=False).encode("utf-8")
+                close = (headers.get("connection", "").lower() == "close" or version == "HTTP/1.0" or status == 413
+                         or length is None)
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                    f"Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1") + data
+                )
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _watch_rates(self) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            await asyncio.get_running_loop().run_in_executor(None, self.holder.refresh)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        self._watcher = asyncio.ensure_future(self._watch_rates())
+        return await asyncio.start_server(self._client, host, port)
+
+    def stop(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            self._watcher = None
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = 8765) -> None:
+        server = await self.start(host, port)
+        addr = server.sockets[0].getsockname()
+        print(f"Serving on http://{addr[0]}:{addr[1]} (rates: {self.holder.path})")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.stop()
+
+
+def serve(rates_path: str | Path = "rates.yml", host: str = "127.0.0.1", port: int = 8765,
+          reload_interval: float = 1.0) -> None:
+    try:
+        asyncio.run(PricingService(rates_path, reload_interval).serve_forever(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -1,10 +1,17 @@
 from __future__ import annotations
+from bisect import bisect_right
 from dataclasses import dataclass
 from datetime import date
 from typing import List, Dict, Any, Tuple
-import yaml
 from pathlib import Path
 
+from instrumentation import count, timed
+from rates import LruCache, parse_date
+from trip_model import cents
+
+# (id(schedule), band index) -> (schedule, (amount, cents)); schedule kept so its id stays unique
+SK_RESULT_CACHE = LruCache(maxsize=256)
+
 @dataclass(frozen=True)
 class SkBand:
     name: str
@@ -17,12 +24,13 @@ class SkSchedule:
     effective_from: date
     bands: List[SkBand]
 
-def _parse_date(d: str) -> date:
-    y, m, dd = d.split("-")
-    return date(int(y), int(m), int(dd))
-
 def load_sk_rates(path: str | Path) -> List[SkSchedule]:
+    import yaml
+
     data: Dict[str, Any] = yaml.safe_load(Path(path).read_text(encoding="utf-8"))
+    return build_sk_schedules(data)
+
+def build_sk_schedules(data: Dict[str, Any]) -> List[SkSchedule]:
     sk = data["countries"]["SK"]["schedules"]
     schedules: List[SkSchedule] = []
     for s in sk:
@@ -36,21 +44,44 @@ def load_sk_rates(path: str | Path) -> List[SkSchedule]:
             for b in s["bands"]
         ]
         bands.sort(key=lambda x: x.min_hours_inclusive)
-        schedules.append(SkSchedule(effective_from=_parse_date(s["effective_from"]), bands=bands))
+        schedules.append(SkSchedule(effective_from=parse_date(s["effective_from"]), bands=bands))
     schedules.sort(key=lambda x: x.effective_from)
     return schedules
 
 def pick_sk_schedule(schedules: List[SkSchedule], on_date: date) -> SkSchedule:
-    valid = [s for s in schedules if s.effective_from <= on_date]
-    if not valid:
+    # schedules are sorted by load_sk_rates -> O(log n) bisect, no per-call list rebuild
+    i = bisect_right(schedules, on_date, key=lambda s: s.effective_from)
+    if i == 0:
         raise ValueError("No SK schedule valid for date")
-    return valid[-1]
+    return schedules[i - 1]
 
-def compute_sk_per_diem_for_day(sk_schedules: List[SkSchedule], day: date, hours: float) -> float:
+def _sk_priced(sk_schedules: List[SkSchedule], day: date, hours: float) -> Tuple[float, int]:
+    count("lookups")
     if hours < 5:
-        return 0.0
+        return 0.0, 0
     sched = pick_sk_schedule(sk_schedules, day)
-    for b in sched.bands:
+    for i, b in enumerate(sched.bands):
         if b.min_hours_inclusive <= hours < b.max_hours_exclusive:
-            return round(b.amount, 2)
-    raise ValueError("No SK band matched")
+            break
+    else:
+        raise ValueError("No SK band matched")
+
+    cache = SK_RESULT_CACHE
+    key = (id(sched), i)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit[1]
+    amount = round(b.amount, 2)
+    priced = (amount, cents(amount))
+    cache.put(key, (sched, priced))
+    return priced
+
+
+@timed("per_diem.sk")
+def compute_sk_per_diem_for_day(sk_schedules: List[SkSchedule], day: date, hours: float) -> float:
+    return _sk_priced(sk_schedules, day, hours)[0]
+
+
+@timed("per_diem.sk")
+def compute_sk_per_diem_cents(sk_schedules: List[SkSchedule], day: date, hours: float) -> int:
+    return _sk_priced(sk_schedules, day, hours)[1]
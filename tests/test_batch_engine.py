@@ -0,0 +1,118 @@
+# tests/test_batch_engine.py
+import random
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from rates_bundle import load_rates_bundle
+from per_diem import compute_foreign_per_diem_for_day
+from sk_per_diem import compute_sk_per_diem_for_day
+from per_diem_batch import compute_per_diem_batch
+
+RATES_YML = Path(__file__).resolve().parent.parent / "rates.yml"
+
+
+def test_batch_matches_scalar_to_the_cent():
+    rates = load_rates_bundle(RATES_YML)
+    rnd = random.Random(7)
+    codes, days, hours = [], [], []
+    for _ in range(5000):
+        codes.append(rnd.choice(["SK", "CZ", "PL", "DE", "AT", "UK"]))
+        days.append(date(2025, 1, 1) + timedelta(days=rnd.randrange(700)))
+        hours.append(rnd.choice([0.0, 4.99, 5.0, 6.0, 11.999, 12.0, 18.0, 24.0, rnd.uniform(0, 24)]))
+
+    res = compute_per_diem_batch(rates, codes, days, hours)
+
+    for i, (c, d, h) in enumerate(zip(codes, days, hours)):
+        if c == "SK":
+            amt = compute_sk_per_diem_for_day(rates.sk_schedules, d, h)
+            assert (res.amount[i], res.currency[i], res.eur[i]) == (amt, "EUR", amt)
+        else:
+            r = compute_foreign_per_diem_for_day(rates, c, d, h)
+            assert (res.amount[i], res.currency[i], res.eur[i]) == \
+                (r.original.amount, r.original.currency, r.eur.amount)
+
+
+def test_batch_errors_match_scalar():
+    rates = load_rates_bundle(RATES_YML)
+    with pytest.raises(ValueError):
+        compute_per_diem_batch(rates, ["XX"], [date(2025, 1, 1)], [10.0])
+    with pytest.raises(ValueError):
+        compute_per_diem_batch(rates, ["CZ"], [date(2012, 1, 1)], [10.0])
+    with pytest.raises(ValueError):
+        compute_per_diem_batch(rates, ["SK"], [date(2024, 12, 31)], [10.0])
+
+
+def _random_trips(n, seed=3):
+    from datetime import datetime, time as dtime
+    rnd = random.Random(seed)
+    trips = []
+    for _ in range(n):
+        start = datetime(2025, 1, 1, rnd.randrange(24), rnd.choice([0, 15, 30])) + timedelta(days=rnd.randrange(300))
+        end = start + timedelta(hours=rnd.choice([3, 9, 14, 30, 50, 80]), minutes=rnd.choice([0, 20, 45]))
+        country = rnd.choice(["SK", "CZ", "DE", "UK"])
+        b_out = b_in = None
+        if rnd.random() < 0.7:
+            out_dt = start + (end - start) * rnd.uniform(0.05, 0.4)
+            in_dt = start + (end - start) * rnd.uniform(0.6, 0.95)
+            if in_dt - out_dt < timedelta(days=1):
+                b_out = dtime(out_dt.hour, out_dt.minute)
+                b_in = dtime(in_dt.hour, in_dt.minute)
+        crossings = None
+        if b_out is None and end - start > timedelta(hours=20) and rnd.random() < 0.5:
+            # SK -> A -> B -> SK, bare times (dates inferred) or pinned datetimes
+            cuts = sorted(start + (end - start) * rnd.uniform(0.0, 0.99) for _ in range(3))
+            cuts = [c.replace(second=0, microsecond=0) + timedelta(minutes=1) for c in cuts]
+            if len(set(cuts)) == 3 and all(b - a < timedelta(days=1) for a, b in zip([start] + cuts, cuts)):
+                crossings = [(c, at if rnd.random() < 0.5 else at.time())
+                             for c, at in zip(rnd.sample(["AT", "DE", "CZ", "UK"], 2) + ["SK"], cuts)]
+        trips.append({"country": country, "start_dt": start, "end_dt": end, "border_out": b_out,
+                      "border_in": b_in, "crossings": crossings})
+    return trips
+
+
+def test_expand_trips_matches_scalar_segments():
+    pd = pytest.importorskip("pandas")
+    from compute_trip_segments import split_trip_into_country_segments, iter_days, hours_in_day
+    from trip_segments_batch import expand_trips_to_days
+
+    trips = _random_trips(400)
+    assert sum(bool(t["crossings"]) for t in trips) > 20
+    expected = []
+    for idx, t in enumerate(trips, start=1):
+        for country, s, e in split_trip_into_country_segments(t):
+            for day in iter_days(s, e):
+                hrs = hours_in_day(s, e, day)
+                if hrs > 0:
+                    expected.append((idx, country, day, hrs))
+
+    out = expand_trips_to_days(pd.DataFrame(trips))
+    got = list(zip(out["trip_id"], out["country"], [d.date() for d in out["day"]], out["hours"]))
+    assert got == expected
+
+
+def test_expand_trips_rejects_out_of_bounds_borders():
+    pd = pytest.importorskip("pandas")
+    from datetime import datetime, time as dtime
+    from trip_segments_batch import expand_trips_to_days
+
+    df = pd.DataFrame([{
+        "country": "CZ", "start_dt": datetime(2025, 3, 1, 8), "end_dt": datetime(2025, 3, 1, 12),
+        "border_out": dtime(9, 0), "border_in": dtime(13, 0),
+    }])
+    with pytest.raises(ValueError):
+        expand_trips_to_days(df)
+
+
+@pytest.mark.parametrize("country", ["CZ", "SK"])
+def test_scalar_segments_reject_out_of_bounds_borders(country):
+    from datetime import datetime, time as dtime
+    from compute_trip_segments import split_trip_into_country_segments
+
+    trip = {"country": country, "start_dt": datetime(2025, 3, 1, 8), "end_dt": datetime(2025, 3, 1, 12),
+            "border_out": dtime(9, 0), "border_in": dtime(13, 0)}
+    with pytest.raises(ValueError, match="out of trip bounds"):
+        split_trip_into_country_segments(trip)
@@ -0,0 +1,103 @@
+# tests/test_export_writers.py
+import csv
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from export_writers import COLUMNS, CsvRowWriter, ParquetRowWriter, RowWriters
+
+ROWS = [
+    {"trip_id": 1, "purpose": "Brno", "segment_country": "SK", "day": "2025-09-02", "hours": 1.5,
+     "orig_amount": 0.0, "orig_currency": "EUR", "eur_amount": 0.0},
+    {"trip_id": 1, "purpose": "Brno", "segment_country": "CZ", "day": "2025-09-02", "hours": 16.5,
+     "orig_amount": 450.0, "orig_currency": "CZK", "eur_amount": 18.61},
+    {"trip_id": 1, "purpose": "Brno", "segment_country": "TOTAL", "day": "", "hours": "",
+     "orig_amount": "", "orig_currency": "", "eur_amount": 18.61},
+    {"trip_id": 2, "purpose": "Účel, s čiarkou", "segment_country": "SK", "day": "2025-09-04", "hours": 13.0,
+     "orig_amount": 11.6, "orig_currency": "EUR", "eur_amount": 11.6},
+    {"trip_id": 2, "purpose": "Účel, s čiarkou", "segment_country": "TOTAL", "day": "", "hours": "",
+     "orig_amount": "", "orig_currency": "", "eur_amount": 11.6},
+]
+
+
+def _none_for_blank(rows):
+    return [{k: None if v == "" else v for k, v in r.items()} for r in rows]
+
+
+def _read_xlsx(path):
+    ws = openpyxl.load_workbook(path, read_only=True).active
+    header, *rows = ws.iter_rows(values_only=True)
+    return [dict(zip(header, r)) for r in rows]
+
+
+def _read_csv(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_rows_round_trip_all_formats(tmp_path):
+    out = {ext: tmp_path / f"o.{ext}" for ext in ("xlsx", "csv", "parquet")}
+    with RowWriters(xlsx=out["xlsx"], csv_path=out["csv"], parquet=out["parquet"]) as w:
+        for r in ROWS:
+            w.write(r)
+    assert w.rows == len(ROWS)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["o.csv", "o.parquet", "o.xlsx"]
+
+    # blanks of the TOTAL rows come back as empty cells / nulls, numbers stay numbers
+    assert _read_xlsx(out["xlsx"]) == _none_for_blank(ROWS)
+    assert pq.read_table(out["parquet"]).to_pylist() == _none_for_blank(ROWS)
+    assert _read_csv(out["csv"]) == [{k: str(v) for k, v in r.items()} for r in ROWS]
+
+
+def test_parquet_batches_and_csv_column_subset(tmp_path):
+    pw = ParquetRowWriter(tmp_path / "o.parquet", batch_size=2)
+    cw = CsvRowWriter(tmp_path / "o.csv", columns=["trip_id", "eur_amount"])
+    for r in ROWS:
+        pw.write(r)
+        cw.write(r)
+    pw.close()
+    cw.close()
+
+    f = pq.ParquetFile(tmp_path / "o.parquet")
+    assert f.metadata.num_row_groups == 3
+    assert f.read().column_names == COLUMNS
+    assert f.read().to_pylist() == _none_for_blank(ROWS)
+    assert _read_csv(tmp_path / "o.csv") == [{"trip_id": str(r["trip_id"]), "eur_amount": str(r["eur_amount"])}
+                                             for r in ROWS]
+
+
+def test_error_keeps_previous_outputs(tmp_path):
+    out = {ext: tmp_path / f"o.{ext}" for ext in ("xlsx", "csv", "parquet")}
+    with RowWriters(xlsx=out["xlsx"], csv_path=out["csv"], parquet=out["parquet"]) as w:
+        w.write(ROWS[0])
+    before = {ext: p.read_bytes() for ext, p in out.items()}
+
+    with pytest.raises(RuntimeError, match="pricing failed"):
+        with RowWriters(xlsx=out["xlsx"], csv_path=out["csv"], parquet=out["parquet"]) as w:
+            for r in ROWS:
+                w.write(r)
+            raise RuntimeError("pricing failed")
+
+    assert {ext: p.read_bytes() for ext, p in out.items()} == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["o.csv", "o.parquet", "o.xlsx"]
+
+
+def test_failed_close_aborts_the_remaining_outputs(tmp_path):
+    w = RowWriters(csv_path=tmp_path / "o.csv", parquet=tmp_path / "o.parquet")
+    for r in ROWS:
+        w.write(r)
+
+    csv_writer = w.writers[0]
+
+    def broken_close():
+        csv_writer.abort()
+        raise OSError("disk full")
+
+    csv_writer.close = broken_close
+    with pytest.raises(OSError, match="disk full"):
+        with w:
+            pass
+    # the parquet output was aborted, not renamed into place
+    assert not (tmp_path / "o.parquet").exists() and not (tmp_path / "o.parquet.part").exists()
@@ -0,0 +1,216 @@
+# tests/test_import_excel.py
+from datetime import datetime, time
+from pathlib import Path
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+pytest.importorskip("pandas")
+
+from import_excel import iter_trips, load_trips
+
+HEADER = ["datum", "miesto", "odchod", "prechod hranice tam", "navrat",
+          "prechod hranice spat", "prichod ", "Dovod", "Country"]
+
+
+def _write_workbook(path, sheets):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append(HEADER)
+        for r in rows:
+            ws.append(r)
+    wb.save(path)
+
+
+ROWS = [
+    [datetime(2025, 9, 1), "TT", time(8, 0), None, datetime(2025, 9, 1), None, time(18, 0), "Ground", "SK"],
+    [datetime(2025, 9, 2), "Brno", time(6, 0), time(7, 30), datetime(2025, 9, 3), "19:15", time(21, 0), "Servis", "cz "],
+    [datetime(2025, 9, 3), None, time(8, 0), None, datetime(2025, 9, 3), None, time(18, 0), None, None],
+    [datetime(2025, 9, 4), "BA", "08:30", None, datetime(2025, 9, 4), None, time(15, 0), None, "SK"],
+    [None, None, None, None, None, None, None, None, None],
+]
+
+
+def test_streaming_and_vectorized_paths_agree(tmp_path):
+    xlsx = tmp_path / "trips.xlsx"
+    _write_workbook(xlsx, {"September 2025": ROWS})
+
+    trips = load_trips(str(xlsx), "September 2025")
+    assert trips == list(iter_trips(str(xlsx), "September 2025"))
+
+    assert [t["country"] for t in trips] == ["SK", "CZ", "SK"]
+    assert trips[1]["start_dt"] == datetime(2025, 9, 2, 6, 0)
+    assert trips[1]["end_dt"] == datetime(2025, 9, 3, 21, 0)
+    assert trips[1]["border_out"] == time(7, 30)
+    assert trips[1]["border_in"] == time(19, 15)
+    assert trips[2]["start_dt"] == datetime(2025, 9, 4, 8, 30)
+    assert trips[2]["purpose"] == ""
+
+
+def test_missing_columns_raise(tmp_path):
+    xlsx = tmp_path / "trips.xlsx"
+    wb = openpyxl.Workbook()
+    wb.active.title = "S"
+    wb.active.append(["datum", "odchod"])
+    wb.save(xlsx)
+    with pytest.raises(ValueError):
+        load_trips(str(xlsx), "S")
+    with pytest.raises(ValueError):
+        list(iter_trips(str(xlsx), "S"))
+
+
+def test_load_all_trips_single_pass(tmp_path, monkeypatch):
+    from import_excel import load_all_trips
+
+    xlsx = tmp_path / "trips.xlsx"
+    _write_workbook(xlsx, {"August 2025": ROWS[:1], "September 2025": ROWS})
+    wb = openpyxl.load_workbook(xlsx)
+    wb.create_sheet("Poznamky").append(["text"])
+    wb.save(xlsx)
+
+    opened = []
+    load_workbook = openpyxl.load_workbook
+    monkeypatch.setattr(openpyxl, "load_workbook", lambda *a, **kw: opened.append(a) or load_workbook(*a, **kw))
+    trips = load_all_trips(str(xlsx))
+    assert [t["sheet"] for t in trips] == ["August 2025"] + ["September 2025"] * 3
+    assert len(opened) == 1
+    monkeypatch.undo()
+    assert load_all_trips(str(xlsx), workers=2) == trips
+
+    with pytest.raises(ValueError):
+        load_all_trips(str(xlsx), sheets=["Poznamky"])
+
+
+def test_trip_cache_roundtrip(tmp_path):
+    pytest.importorskip("pyarrow")
+    from trip_cache import cache_path, load_trips_cached
+
+    xlsx = tmp_path / "trips.xlsx"
+    cache_dir = tmp_path / "cache"
+    _write_workbook(xlsx, {"September 2025": ROWS})
+
+    first = load_trips_cached(str(xlsx), "September 2025", cache_dir)
+    assert cache_path(xlsx, "September 2025", cache_dir).exists()
+    assert load_trips_cached(str(xlsx), "September 2025", cache_dir) == first == \
+        load_trips(str(xlsx), "September 2025")
+
+    # workbook edit -> new key, fresh parse
+    _write_workbook(xlsx, {"September 2025": ROWS[:1]})
+    assert len(load_trips_cached(str(xlsx), "September 2025", cache_dir)) == 1
+
+
+def test_settle_sheet_selection():
+    from cestovne import select_sheets, sheet_month
+
+    names = ["August", "Januar2019", "December 2024", "Januar 2025", "February 2025",
+             "Marec 2025", "April 2025 (7)"]
+    assert sheet_month("Januar2019") == (2019, 1)
+    assert sheet_month("April 2025 (7)") is None
+    assert select_sheets(names, "2024-12..2025-02") == ["December 2024", "Januar 2025", "February 2025"]
+    assert select_sheets(names, "August, 2025-03") == ["August", "Marec 2025"]
+    with pytest.raises(ValueError):
+        select_sheets(names, "Jul 2031")
+
+
+def test_crossings_column_multi_country(tmp_path):
+    from compute_trip_segments import split_trip_into_country_segments
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "September 2025"
+    ws.append(["datum", "odchod", "navrat", "prichod", "Country", "Prechody hraníc"])
+    ws.append([datetime(2025, 9, 8), time(5, 0), datetime(2025, 9, 10), time(22, 0), "DE",
+               "AT 06:30, DE 11:15; SK 2025-09-10 19:40"])
+    ws.append([datetime(2025, 9, 11), time(8, 0), datetime(2025, 9, 11), time(18, 0), "SK", None])
+    xlsx = tmp_path / "trips.xlsx"
+    wb.save(xlsx)
+
+    trips = load_trips(str(xlsx), "September 2025")
+    assert trips == list(iter_trips(str(xlsx), "September 2025"))
+    assert trips[0]["crossings"] == [("AT", time(6, 30)), ("DE", time(11, 15)), ("SK", datetime(2025, 9, 10, 19, 40))]
+    assert trips[1]["crossings"] is None
+
+    segs = split_trip_into_country_segments(trips[0])
+    assert [(c, s.strftime("%d %H:%M"), e.strftime("%d %H:%M")) for c, s, e in segs] == [
+        ("SK", "08 05:00", "08 06:30"),
+        ("AT", "08 06:30", "08 11:15"),
+        ("DE", "08 11:15", "10 19:40"),
+        ("SK", "10 19:40", "10 22:00"),
+    ]
+
+    pytest.importorskip("pyarrow")
+    from trip_cache import load_trips_cached
+
+    load_trips_cached(str(xlsx), "September 2025", tmp_path / "cache")
+    assert load_trips_cached(str(xlsx), "September 2025", tmp_path / "cache") == trips
+
+
+def test_excel_time_serials(tmp_path):
+    # unformatted time cells arrive as day fractions (0.3125 == 07:30)
+    rows = [
+        [datetime(2025, 9, 2), "Brno", 0.25, 0.3125, datetime(2025, 9, 3), 0.8020833333, 0.875, "Servis", "CZ"],
+        [datetime(2025, 9, 4), "Wien", time(6, 0), "07:30", datetime(2025, 9, 4), 0.75, "20:00", None, "AT"],
+        [datetime(2025, 9, 5), "Linz", 0.25, None, datetime(2025, 9, 5), None, 0.75, None, "AT"],
+    ]
+    xlsx = tmp_path / "trips.xlsx"
+    _write_workbook(xlsx, {"September 2025": rows})
+
+    trips = load_trips(str(xlsx), "September 2025")
+    assert trips == list(iter_trips(str(xlsx), "September 2025"))
+    assert trips[0]["start_dt"] == datetime(2025, 9, 2, 6, 0)
+    assert trips[0]["end_dt"] == datetime(2025, 9, 3, 21, 0)
+    assert (trips[0]["border_out"], trips[0]["border_in"]) == (time(7, 30), time(19, 15))
+    assert (trips[1]["border_out"], trips[1]["border_in"]) == (time(7, 30), time(18, 0))
+    assert trips[2]["border_out"] is None and trips[2]["end_dt"] == datetime(2025, 9, 5, 18, 0)
+
+    # the frame keeps border offsets; the batch expansion takes them as they are
+    import pandas as pd
+    from import_excel import load_trips_frame
+    from trip_segments_batch import expand_trips_to_days
+
+    df = load_trips_frame(str(xlsx), "September 2025")
+    assert str(df["border_out"].dtype) == "timedelta64[ns]" and pd.isna(df["border_out"].iloc[2])
+    as_times = pd.DataFrame([dict(t) for t in trips])
+    pd.testing.assert_frame_equal(expand_trips_to_days(df.reset_index(drop=True)), expand_trips_to_days(as_times))
+
+
+def test_time_offsets_column_types():
+    import numpy as np
+    import pandas as pd
+    from import_excel import _to_time, time_offsets
+
+    values = [time(7, 30), datetime(2025, 1, 1, 8, 15), "8:30", " 19:15:20 ", "24:00", "x", 0.5, 1.5, None]
+    off = time_offsets(pd.Series(values, dtype=object))
+    assert off.dtype == np.dtype("timedelta64[ns]")
+    for v, o in zip(values, off):
+        t = _to_time(v)
+        assert np.isnat(o) if t is None else o == np.timedelta64(t.hour * 3600 + t.minute * 60 + t.second, "s")
+    assert list(time_offsets(pd.Series([0.25, np.nan]))[:1]) == [np.timedelta64(6, "h")]
+
+
+def test_settle_literal_sheets_are_strict_in_mixed_specs(tmp_path):
+    from cestovne import settle
+    from rates_bundle import load_rates_bundle
+
+    xlsx = tmp_path / "trips.xlsx"
+    _write_workbook(xlsx, {"August 2025": ROWS[:2], "September 2025": ROWS})
+    wb = openpyxl.load_workbook(xlsx)
+    wb.create_sheet("Poznamky").append(["len poznamky"])
+    wb.save(xlsx)
+    rates = load_rates_bundle(Path(__file__).resolve().parent.parent / "rates.yml")
+
+    n = settle([str(xlsx)], "2025-08..2025-12", rates, csv_out=str(tmp_path / "o.csv"))
+    lines = (tmp_path / "o.csv").read_text(encoding="utf-8").splitlines()
+    assert n == len(lines) - 1
+    assert lines[0].startswith("workbook,sheet,trip_id")
+    assert {line.split(",")[1] for line in lines[1:]} == {"August 2025", "September 2025"}
+    # TOTAL row per trip, trip_id restarting in each sheet
+    totals = [line.split(",")[1:3] for line in lines[1:] if ",TOTAL," in line]
+    assert totals[:2] == [["August 2025", "1"], ["August 2025", "2"]] and totals[2] == ["September 2025", "1"]
+
+    # a literal sheet without the columns raises even next to a month range
+    with pytest.raises(ValueError, match="Missing columns"):
+        settle([str(xlsx)], "Poznamky, 2025-08..2025-09", rates, csv_out=str(tmp_path / "p.csv"))
+    assert settle([str(xlsx)], None, rates, csv_out=str(tmp_path / "a.csv")) == n
@@ -0,0 +1,42 @@
+# tests/test_import_time.py
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Core calculators and CLI modules must import without the heavy backends;
+# pandas / openpyxl / PyMuPDF / yaml are loaded on first use.
+LIGHT_MODULES = ["rates", "per_diem", "sk_per_diem", "compute_trip_segments", "rates_bundle",
+                 "import_excel", "trip_cache", "export_all", "cestovne", "pdf_export"]
+HEAVY = {"pandas", "numpy", "openpyxl", "fitz", "pymupdf", "yaml", "pyarrow"}
+
+
+def _imported(code: str):
+    """top-level packages imported by code, from python -X importtime"""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    # "import time: self [us] | cumulative | imported package"
+    return {
+        line.rsplit("|", 1)[1].strip().split(".")[0]
+        for line in res.stderr.splitlines()
+        if line.startswith("import time:") and line.count("|") == 2
+    }
+
+
+def test_core_modules_do_not_import_heavy_backends():
+    for mod in LIGHT_MODULES:
+        heavy = HEAVY & (_imported(f"import {mod}"))
+        assert not heavy, f"import {mod} pulls in {sorted(heavy)}"
+
+
+def test_single_day_calculation_stays_light():
+    code = (
+        "from datetime import date\n"
+        "from sk_per_diem import SkBand, SkSchedule, compute_sk_per_diem_for_day\n"
+        "s = SkSchedule(date(2025, 1, 1), [SkBand('a', 5, 12, 7.8)])\n"
+        "assert compute_sk_per_diem_for_day([s], date(2025, 2, 1), 6) == 7.8\n"
+    )
+    assert not HEAVY & (_imported(code))
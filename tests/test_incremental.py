@@ -0,0 +1,72 @@
+# tests/test_incremental.py
+from datetime import date, datetime, time
+from time import perf_counter
+from pathlib import Path
+
+from rates_bundle import load_rates_bundle
+from export_all import iter_export_rows
+from incremental import IncrementalStore, changed_ranges
+
+RATES_YML = Path(__file__).resolve().parent.parent / "rates.yml"
+
+TRIPS = [
+    {"country": "SK", "start_dt": datetime(2025, 3, 10, 7), "end_dt": datetime(2025, 3, 10, 20),
+     "purpose": "BA", "border_out": None, "border_in": None},
+    {"country": "CZ", "start_dt": datetime(2025, 9, 2, 6), "end_dt": datetime(2025, 9, 3, 21),
+     "purpose": "Brno", "border_out": time(7, 30), "border_in": time(19, 15)},
+]
+
+
+def _run(state, yml):
+    rates = load_rates_bundle(yml)
+    store = IncrementalStore(state, rates)
+    rows = list(iter_export_rows(TRIPS, rates, store))
+    store.close()
+    return rows, store.recomputed, store.reused
+
+
+def test_changed_ranges():
+    old = [(10, "a"), (20, "b")]
+    assert changed_ranges(old, old) == []
+    assert changed_ranges(old, [(10, "a"), (20, "c")])[0][0] == 20
+    assert changed_ranges(old, [(10, "a"), (15, "x"), (20, "b")]) == [(15, 19)]
+    assert changed_ranges(old, [(10, "a"), (10, "z"), (20, "b")]) == [(10, 19)]
+    assert changed_ranges(old, [(10, "a")]) == [(20, date.max.toordinal())]
+    assert changed_ranges([], old) == [(10, date.max.toordinal())]
+
+
+def test_changed_ranges_daily_history_is_linear():
+    old = [(700000 + i, repr(1 / (25 + i % 7))) for i in range(6500)]
+    new = old[:3000] + [(old[3000][0], "x")] + old[3001:]
+    t0 = perf_counter()
+    assert changed_ranges(old, new) == [(703000, 703000)]
+    assert perf_counter() - t0 < 0.1
+
+
+def test_only_trips_touching_changed_rates_recompute(tmp_path):
+    yml = tmp_path / "rates.yml"
+    text = RATES_YML.read_text(encoding="utf-8")
+    yml.write_text(text, encoding="utf-8")
+    state = tmp_path / "state.sqlite"
+
+    full, recomputed, reused = _run(state, yml)
+    assert (recomputed, reused) == (2, 0)
+    again, recomputed, reused = _run(state, yml)
+    assert (recomputed, reused) == (0, 2)
+    assert again == full
+
+    # CZK rate from 2026 -> trips in 2025 are unaffected
+    yml.write_text(text.replace("rate: 0.04136\n\n  GBP", "rate: 0.05\n\n  GBP"), encoding="utf-8")
+    assert _run(state, yml)[1:] == (0, 2)
+
+    # CZK rate for 2025 -> only the CZ trip
+    yml.write_text(text.replace("rate: 0.04136", "rate: 0.05"), encoding="utf-8")
+    rows, recomputed, reused = _run(state, yml)
+    assert (recomputed, reused) == (1, 1)
+    assert rows != full
+
+    # SK bands valid until 2025-03-31 -> only the March SK trip
+    yml.write_text(text.replace("rate: 0.04136", "rate: 0.05").replace("amount: 12.30", "amount: 12.50"), encoding="utf-8")
+    rows, recomputed, reused = _run(state, yml)
+    assert (recomputed, reused) == (1, 1)
+    assert rows[0]["eur_amount"] == 12.50
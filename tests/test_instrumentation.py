@@ -0,0 +1,108 @@
+# tests/test_instrumentation.py
+import json
+from datetime import datetime
+from pathlib import Path
+
+from instrumentation import METRICS, stage, timed
+
+RATES_YML = Path(__file__).resolve().parent.parent / "rates.yml"
+
+
+def test_disabled_metrics_record_nothing():
+    METRICS.reset()
+    calls = []
+
+    @timed("noop")
+    def f(x):
+        calls.append(x)
+        return x * 2
+
+    assert f(2) == 4 and calls == [2]
+    with stage("outer"):
+        pass
+    assert METRICS.report()["stages"] == {}
+
+
+def test_export_stage_report(tmp_path, monkeypatch):
+    from export_all import export
+    from rates_bundle import load_rates_bundle
+
+    monkeypatch.setattr(METRICS, "enabled", True)
+    METRICS.reset()
+    rates = load_rates_bundle(RATES_YML)
+    trips = [
+        {"country": "CZ", "start_dt": datetime(2025, 9, 2, 6), "end_dt": datetime(2025, 9, 3, 20), "purpose": "x"},
+        {"country": "SK", "start_dt": datetime(2025, 9, 4, 8), "end_dt": datetime(2025, 9, 4, 18), "purpose": "y"},
+    ]
+    rows = export(trips, rates, out=str(tmp_path / "out.xlsx"))
+
+    out = tmp_path / "timings.json"
+    METRICS.write_json(out)
+    report = json.loads(out.read_text(encoding="utf-8"))
+    METRICS.reset()
+
+    assert report["counters"] == {"trips": 2, "trip_days": 3, "lookups": 3, "rows": rows}
+    assert report["stages"]["segment"]["calls"] == 2
+    assert report["stages"]["per_diem.foreign"]["calls"] == 2
+    assert report["stages"]["per_diem.sk"]["calls"] == 1
+    assert report["stages"]["export"]["seconds"] >= report["stages"]["export.save"]["seconds"]
+
+
+def test_instrumented_run_disables_metrics_afterwards(tmp_path):
+    import argparse
+
+    import pytest
+
+    from instrumentation import instrumented
+
+    args = argparse.Namespace(timings=str(tmp_path / "t.json"), profile=None)
+    with pytest.raises(RuntimeError):
+        with instrumented(args):
+            assert METRICS.enabled
+            raise RuntimeError("boom")
+    assert not METRICS.enabled
+    with instrumented(args):
+        pass
+    assert not METRICS.enabled
+    METRICS.reset()
+
+
+def test_timings_report_covers_one_run(tmp_path, monkeypatch):
+    import openpyxl
+
+    import export_all
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "September 2025"
+    ws.append(["datum", "odchod", "navrat", "prichod", "country"])
+    for d in range(1, 11):
+        ws.append([datetime(2025, 9, d), "08:00", datetime(2025, 9, d), "18:00", "SK"])
+    wb.save(tmp_path / "trips.xlsx")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(export_all, "XLSX", str(tmp_path / "trips.xlsx"))
+    monkeypatch.setattr(export_all, "RATES", str(RATES_YML))
+
+    reports = []
+    for run in range(2):
+        timings = tmp_path / f"t{run}.json"
+        export_all.main(["--sheet", "September 2025", "--out", str(tmp_path / "o.xlsx"), "--timings", str(timings)])
+        reports.append(json.loads(timings.read_text(encoding="utf-8")))
+    assert [r["counters"]["trips"] for r in reports] == [10, 10]
+    assert [r["stages"]["export"]["calls"] for r in reports] == [1, 1]
+    METRICS.reset()
+
+
+def test_failed_export_closes_outputs(tmp_path):
+    import pytest
+
+    from export_all import export
+    from rates_bundle import load_rates_bundle
+
+    trips = [{"country": "SK", "start_dt": datetime(2025, 9, 4, 8), "end_dt": datetime(2025, 9, 4, 18)},
+             {"country": "XX", "start_dt": datetime(2025, 9, 5, 8), "end_dt": datetime(2025, 9, 5, 18)}]
+    with pytest.raises(ValueError):
+        export(trips, load_rates_bundle(RATES_YML), out=str(tmp_path / "o.xlsx"), csv_out=str(tmp_path / "o.csv"),
+               ledger=str(tmp_path / "l.sqlite"))
+    # csv handle closed and its .part removed, nothing renamed into place
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["l.sqlite"]
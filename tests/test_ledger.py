@@ -0,0 +1,94 @@
+# tests/test_ledger.py
+import time
+from datetime import date, timedelta
+
+from ledger import Ledger
+
+
+def _rows(sheet_days, trip_id=1, country="DE", eur=45.0, orig=None, currency="EUR"):
+    rows = []
+    for d in sheet_days:
+        rows.append({"trip_id": trip_id, "purpose": "x", "segment_country": country, "day": str(d), "hours": 13.0,
+                     "orig_amount": orig if orig is not None else eur, "orig_currency": currency, "eur_amount": eur})
+    rows.append({"trip_id": trip_id, "purpose": "x", "segment_country": "TOTAL", "day": "", "hours": "",
+                 "orig_amount": "", "orig_currency": "", "eur_amount": eur * len(sheet_days)})
+    return rows
+
+
+def test_totals_and_sheet_replacement(tmp_path):
+    with Ledger(tmp_path / "l.sqlite") as led:
+        jul = [date(2025, 7, 1) + timedelta(days=i) for i in range(3)]
+        sep = [date(2025, 9, 29), date(2025, 9, 30), date(2025, 10, 1)]
+        assert led.replace_rows(_rows(jul) + _rows(sep, trip_id=2, country="CZ", eur=12.41, orig=300.0,
+                                                   currency="CZK"), "wb.xlsx", "Q3") == 6
+
+        assert led.total(country="DE") == 135.0
+        assert led.total(start="2025-07-01", end="2025-09-30") == 135.0 + 2 * 12.41
+        assert [(r["key"], r["trip_days"], r["eur_amount"]) for r in led.totals_by("quarter")] == \
+            [("2025-Q3", 5, 159.82), ("2025-Q4", 1, 12.41)]
+        cz = led.totals_by("country", country="CZ")[0]
+        assert (cz["orig_amount"], cz["orig_currency"]) == (900.0, "CZK")
+
+        # re-export of the sheet replaces its rows, other sheets stay
+        led.replace_rows(_rows(jul, eur=30.0), "wb.xlsx", "Q3")
+        led.replace_rows(_rows(sep, trip_id=1), "wb.xlsx", "Q4")
+        assert led.total(sheet="Q3") == 90.0
+        assert len(led.days(sheet="Q4")) == 3
+
+
+def test_range_queries_stay_fast(tmp_path):
+    with Ledger(tmp_path / "l.sqlite") as led:
+        start = date(2020, 1, 1)
+        rows = []
+        for trip in range(20_000):
+            d = start + timedelta(days=trip % 2000)
+            rows += _rows([d, d + timedelta(days=1)], trip_id=trip, country=("DE", "CZ", "AT", "SK")[trip % 4])
+        led.replace_rows(rows, "wb.xlsx", "all")
+
+        t0 = time.perf_counter()
+        total = led.total(start="2024-07-01", end="2024-09-30", country="DE")
+        by_q = led.totals_by("quarter", country="AT")
+        assert time.perf_counter() - t0 < 0.5
+        assert total > 0 and len(by_q) > 20
+
+
+def test_failed_settle_keeps_ledger_and_outputs(tmp_path):
+    import pytest
+
+    openpyxl = pytest.importorskip("openpyxl")
+    from datetime import datetime, time as dtime
+    from pathlib import Path
+
+    from cestovne import settle
+    from rates_bundle import load_rates_bundle
+
+    rates = load_rates_bundle(Path(__file__).resolve().parent.parent / "rates.yml")
+    header = ["datum", "odchod", "navrat", "prichod", "country"]
+
+    def workbook(aug_trips, sep_odchod):
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)
+        aug = wb.create_sheet("August 2025")
+        aug.append(header)
+        for i in range(aug_trips):
+            aug.append([datetime(2025, 8, 4 + i), dtime(6, 0), datetime(2025, 8, 4 + i), dtime(20, 0), "SK"])
+        sep = wb.create_sheet("September 2025")
+        sep.append(header)
+        sep.append([datetime(2025, 9, 1), sep_odchod, datetime(2025, 9, 1), dtime(20, 0), "SK"])
+        wb.save(tmp_path / "trips.xlsx")
+        return str(tmp_path / "trips.xlsx")
+
+    ledger, out, csv_out = tmp_path / "l.sqlite", tmp_path / "o.xlsx", tmp_path / "o.csv"
+    settle([workbook(6, dtime(7, 0))], None, rates, workers=2, out=str(out), csv_out=str(csv_out), ledger=str(ledger))
+    before = (out.read_bytes(), csv_out.read_text())
+    with Ledger(ledger) as led:
+        days = led.days()
+    assert len(days) == 7
+
+    bad = workbook(1, "7 hodin")
+    with pytest.raises(ValueError, match="Invalid time"):
+        settle([bad], None, rates, workers=2, out=str(out), csv_out=str(csv_out), ledger=str(ledger))
+    with Ledger(ledger) as led:
+        assert led.days() == days
+    assert (out.read_bytes(), csv_out.read_text()) == before
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["l.sqlite", "o.csv", "o.xlsx", "trips.xlsx"]
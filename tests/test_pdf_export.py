@@ -0,0 +1,143 @@
+# tests/test_pdf_export.py
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from pdf_export import build_template_base, new_page_from_base, write_texts
+
+
+def _template(pages=2):
+    tpl = fitz.open()
+    for i in range(pages):
+        p = tpl.new_page()
+        for y in range(40, 800, 12):
+            p.insert_text((50, y), f"vzor strana {i} riadok {y} " + "x" * 60, fontsize=8)
+    return tpl
+
+
+def _render(base, n):
+    out = fitz.open()
+    for k in range(n):
+        for pno in range(base.page_count):
+            page = new_page_from_base(out, base, pno)
+            write_texts(page, [(90, 130, f"Účel cesty: trip {k}", 11)])
+    return out
+
+
+def test_template_shared_across_pages():
+    tpl = _template()
+    base = build_template_base(tpl, {0: [fitz.Rect(85, 120, 520, 155)], 1: []})
+
+    one = _render(base, 1)
+    many = _render(base, 40)
+
+    # each page references the same template XObjects
+    shared = {x[0] for p in many for x in p.get_xobjects() if x[1] == "fullpage"}
+    assert len(shared) == 2 * base.page_count
+
+    # size grows with the per-trip text only, not with the template content
+    tpl_size = len(tpl.tobytes(garbage=3, deflate=True))
+    size_one = len(one.tobytes(garbage=3, deflate=True))
+    size_many = len(many.tobytes(garbage=3, deflate=True))
+    per_trip = (size_many - size_one) / 39
+    assert per_trip < tpl_size / 4
+
+    # whiteout is drawn once in the shared base
+    fills = [d["fill"] for d in base[0].get_drawings()]
+    assert (1.0, 1.0, 1.0) in fills
+    assert "trip 0" in many[0].get_text()
+
+
+def _font_file(tmp_path):
+    path = tmp_path / "font.otf"
+    path.write_bytes(fitz.Font("helv").buffer)
+    return path
+
+
+def _embedded_fonts(doc):
+    """(font program stream xrefs, embedded font xrefs used by the pages)"""
+    refs = {doc.xref_get_key(x, k) for x in range(1, doc.xref_length()) for k in ("FontFile", "FontFile2", "FontFile3")}
+    programs = {int(v.split()[0]) for t, v in refs if t == "xref"}
+    return programs, {f[0] for p in doc for f in p.get_fonts() if f[1] != "n/a"}
+
+
+def test_fill_embeds_font_once(tmp_path):
+    from pdf_export import FieldBox, fill_pdf_template
+
+    tpl_path = tmp_path / "template.pdf"
+    _template(3).save(str(tpl_path))
+    layout = {f"f{p}_{k}": FieldBox(p, 60, 60 + 30 * k, 300, 20) for p in range(3) for k in range(10)}
+    fields = {key: f"Účel cesty {key}" for key in layout}
+
+    out = tmp_path / "out.pdf"
+    fill_pdf_template(tpl_path, out, fields, layout, _font_file(tmp_path))
+
+    doc = fitz.open(str(out))
+    programs, fonts = _embedded_fonts(doc)
+    assert len(programs) == 1 and len(fonts) == 1
+    # subset on save: tagged name, a fraction of the full font
+    (name,) = {f[3] for p in doc for f in p.get_fonts() if f[0] in fonts}
+    assert "+" in name
+    assert len(doc.xref_stream_raw(programs.pop())) < len(fitz.Font("helv").buffer) / 2
+    assert "Účel cesty f2_9" in doc[2].get_text()
+
+
+def test_fill_batch_chunks(tmp_path):
+    from pdf_export import FieldBox, fill_pdf_template_batch
+
+    tpl_path = tmp_path / "template.pdf"
+    _template(2).save(str(tpl_path))
+    layout = {"ucel": FieldBox(0, 60, 60, 300, 20), "suma": FieldBox(1, 60, 60, 300, 20)}
+    records = [{"ucel": f"Účel cesty {i}", "suma": f"{i}.50 EUR"} for i in range(5)]
+    font = _font_file(tmp_path)
+
+    (single,) = fill_pdf_template_batch(tpl_path, records, layout, font, tmp_path / "cesty.pdf")
+    doc = fitz.open(str(single))
+    assert doc.page_count == 10
+    assert "Účel cesty 3" in doc[6].get_text() and "3.50 EUR" in doc[7].get_text()
+    assert [len(x) for x in _embedded_fonts(doc)] == [1, 1]
+
+    paths = fill_pdf_template_batch(tpl_path, iter(records), layout, font, tmp_path / "cesty.pdf", chunk_size=2)
+    assert [p.name for p in paths] == ["cesty_001.pdf", "cesty_002.pdf", "cesty_003.pdf"]
+    assert [fitz.open(str(p)).page_count for p in paths] == [4, 4, 2]
+    assert "Účel cesty 4" in fitz.open(str(paths[2]))[0].get_text()
+
+    assert fill_pdf_template_batch(tpl_path, [], layout, font, tmp_path / "none.pdf") == []
+
+
+def test_fill_keeps_template_widgets_links_and_annotations(tmp_path):
+    from pdf_export import FieldBox, fill_pdf_template, fill_pdf_template_batch
+
+    tpl = _template(1)
+    page = tpl[0]
+    widget = fitz.Widget()
+    widget.field_name = "podpis"
+    widget.field_type = fitz.PDF_WIDGET_TYPE_TEXT
+    widget.rect = fitz.Rect(60, 700, 260, 720)
+    page.add_widget(widget)
+    page.insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(60, 740, 160, 760), "uri": "https://example.com"})
+    page.add_text_annot((300, 740), "poznamka")
+    tpl_path = tmp_path / "template.pdf"
+    tpl.save(str(tpl_path))
+    layout = {"ucel": FieldBox(0, 60, 60, 300, 20)}
+    font = _font_file(tmp_path)
+
+    fill_pdf_template(tpl_path, tmp_path / "one.pdf", {"ucel": "Brno"}, layout, font)
+    (many,) = fill_pdf_template_batch(tpl_path, [{"ucel": "A"}, {"ucel": "B"}], layout, font, tmp_path / "many.pdf")
+    for path, pages in ((tmp_path / "one.pdf", 1), (many, 2)):
+        doc = fitz.open(str(path))
+        assert doc.is_form_pdf and doc.page_count == pages
+        for p in doc:
+            assert len(list(p.widgets())) == 1
+            assert [link["uri"] for link in p.get_links()] == ["https://example.com"]
+            assert [a.type[1] for a in p.annots(types=[fitz.PDF_ANNOT_TEXT])] == ["Text"]
+
+
+def test_overflowing_field_keeps_the_lines_that_fit():
+    from pdf_export import FieldBox, write_fields
+
+    doc = fitz.open()
+    doc.new_page()
+    write_fields(doc, {"ucel": "slovo " * 40}, {"ucel": FieldBox(0, 60, 60, 100, 15)}, fitz.Font("helv"))
+    text = doc[0].get_text().strip()
+    assert text.startswith("slovo") and text.count("slovo") < 40
@@ -87,3 +87,73 @@ fx_rates_to_eur:
     with pytest.raises(ValueError):
         compute_foreign_per_diem_for_day(rates, "UK", date(2026, 2, 2), 13.0)
 
+
+
+def test_results_memoized_per_rates_object(tmp_path):
+    from per_diem import FOREIGN_RESULT_CACHE
+    from sk_per_diem import SK_RESULT_CACHE, build_sk_schedules, compute_sk_per_diem_for_day
+
+    yml = tmp_path / "rates.yml"
+    yml.write_text(
+        """
+version: 1
+foreign_time_bands:
+  - name: "to_12"
+    min_hours_inclusive: 0
+    max_hours_exclusive: 12
+    percent_of_daily: 50
+  - name: "over_12"
+    min_hours_inclusive: 12
+    max_hours_exclusive: 1000
+    percent_of_daily: 100
+countries:
+  DE:
+    currency: EUR
+    schedules:
+      - effective_from: "2013-01-01"
+        daily_base: 45
+  SK:
+    currency: EUR
+    schedules:
+      - effective_from: "2025-01-01"
+        bands:
+          - name: "5_12"
+            min_hours_inclusive: 5
+            max_hours_exclusive: 12
+            amount: 8.30
+fx_rates_to_eur: {}
+""",
+        encoding="utf-8",
+    )
+    rates = load_rates(yml)
+    FOREIGN_RESULT_CACHE.clear()
+
+    first = compute_foreign_per_diem_for_day(rates, "DE", date(2026, 2, 2), 13.0)
+    # another day and other hours in the same schedule and band share the entry
+    assert compute_foreign_per_diem_for_day(rates, "DE", date(2026, 3, 9), 20.5) is first
+    assert compute_foreign_per_diem_for_day(rates, "DE", date(2026, 2, 2), 3.0).eur.amount == 22.5
+    assert FOREIGN_RESULT_CACHE.info()["hits"] == 1
+
+    # a different rates object without a fingerprint starts from an empty cache
+    other = load_rates(yml)
+    assert compute_foreign_per_diem_for_day(other, "DE", date(2026, 2, 2), 13.0) is not first
+    assert FOREIGN_RESULT_CACHE.info()["size"] == 1
+
+    # bundles are keyed by fingerprint: alternating between two keeps both warm
+    from rates_bundle import load_rates_bundle
+
+    yml2 = tmp_path / "rates2.yml"
+    yml2.write_text(yml.read_text(encoding="utf-8").replace("daily_base: 45", "daily_base: 50"), encoding="utf-8")
+    a, b = load_rates_bundle(yml), load_rates_bundle(yml2)
+    FOREIGN_RESULT_CACHE.clear()
+    for _ in range(3):
+        assert compute_foreign_per_diem_for_day(a, "DE", date(2026, 2, 2), 13.0).eur.amount == 45
+        assert compute_foreign_per_diem_for_day(b, "DE", date(2026, 2, 2), 13.0).eur.amount == 50
+    assert FOREIGN_RESULT_CACHE.info()["hits"] == 4
+
+    import yaml
+    sk = build_sk_schedules(yaml.safe_load(yml.read_text(encoding="utf-8")))
+    SK_RESULT_CACHE.clear()
+    assert compute_sk_per_diem_for_day(sk, date(2025, 5, 1), 6.0) == 8.30
+    assert compute_sk_per_diem_for_day(sk, date(2025, 6, 1), 11.0) == 8.30
+    assert SK_RESULT_CACHE.info()["hits"] == 1
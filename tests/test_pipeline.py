@@ -0,0 +1,141 @@
+# tests/test_pipeline.py
+import threading
+import time as _time
+from datetime import datetime, time, timedelta
+from pathlib import Path
+
+import pytest
+
+openpyxl = pytest.importorskip("openpyxl")
+
+from pipeline import RowsSink, run_pipeline
+from rates_bundle import load_rates_bundle
+
+RATES_YML = Path(__file__).resolve().parent.parent / "rates.yml"
+HEADER = ["datum", "odchod", "prechod hranice tam", "navrat", "prechod hranice spat", "prichod", "dovod",
+          "country", "prechody hranic"]
+
+
+def _workbook(path, sheets=("August 2025", "September 2025"), per_sheet=37):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for s, name in enumerate(sheets):
+        ws = wb.create_sheet(name)
+        ws.append(HEADER)
+        for i in range(per_sheet):
+            day = datetime(2025, 8 + s, 1) + timedelta(days=i % 28)
+            if i % 3 == 0:
+                ws.append([day, time(7, 0), None, day, None, time(17, 30), f"SK {i}", "SK", None])
+            elif i % 3 == 1:
+                ws.append([day, time(5, 0), time(6, 30), day + timedelta(days=1), time(19, 0), time(21, 0),
+                           f"CZ {i}", "CZ", None])
+            else:
+                ws.append([day, time(5, 0), None, day + timedelta(days=2), None, time(22, 0), f"DE {i}", "DE",
+                           "AT 06:30, DE 11:15, SK 19:40"])
+    wb.save(path)
+    return path
+
+
+class _ListWriter:
+    def __init__(self):
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_pipeline_matches_sequential_settle(tmp_path, workers):
+    from cestovne import settle
+
+    xlsx = _workbook(tmp_path / "trips.xlsx")
+    rates = load_rates_bundle(RATES_YML)
+    settle([str(xlsx)], None, rates, csv_out=str(tmp_path / "seq.csv"))
+    n = settle([str(xlsx)], None, rates, workers=workers, csv_out=str(tmp_path / "pipe.csv"), pipeline=True)
+    assert n == len((tmp_path / "seq.csv").read_text().splitlines()) - 1
+    assert (tmp_path / "pipe.csv").read_text() == (tmp_path / "seq.csv").read_text()
+
+
+def test_backpressure_and_stats(tmp_path, monkeypatch):
+    import pipeline
+
+    xlsx = _workbook(tmp_path / "trips.xlsx", per_sheet=60)
+    rates = load_rates_bundle(RATES_YML)
+    read = [0]
+    read_ahead = []
+
+    iter_sheets_trips = pipeline.iter_sheets_trips
+
+    def counting(*args):
+        for t in iter_sheets_trips(*args):
+            read[0] += 1
+            yield t
+
+    monkeypatch.setattr(pipeline, "iter_sheets_trips", counting)
+
+    class SlowSink(RowsSink):
+        name = "slow"
+        written = 0
+
+        def write(self, trips, table):
+            read_ahead.append(read[0] - self.written)
+            _time.sleep(0.01)
+            self.written += len(trips)
+            return super().write(trips, table)
+
+    out = _ListWriter()
+    stats = run_pipeline([(str(xlsx), ["August 2025", "September 2025"], False)], rates, [SlowSink(out)],
+                         batch_size=5, queue_size=2)
+
+    assert list(stats) == ["read", "price", "slow"]
+    assert stats["read"].items == stats["price"].items == stats["slow"].items == 120
+    assert stats["slow"].batches == 24
+    # the reader stays within two full queues plus one batch per stage of the sink
+    assert max(read_ahead) <= (2 * 2 + 3) * 5 + 1
+    assert stats["read"].blocked > 0
+    assert len([r for r in out.rows if r["segment_country"] == "TOTAL"]) == 120
+    assert stats["price"].as_dict()["items_per_sec"] > 0
+
+
+def test_stage_error_is_raised(tmp_path):
+    xlsx = _workbook(tmp_path / "trips.xlsx", per_sheet=40)
+
+    class Broken(RowsSink):
+        def write(self, trips, table):
+            raise RuntimeError("disk full")
+
+    before = threading.active_count()
+    with pytest.raises(RuntimeError, match="disk full"):
+        run_pipeline([(str(xlsx), ["August 2025"], False)], load_rates_bundle(RATES_YML), [Broken(_ListWriter())],
+                     batch_size=4, queue_size=1)
+    assert threading.active_count() == before
+
+
+def test_sink_names_must_be_distinct(tmp_path):
+    rates = load_rates_bundle(RATES_YML)
+    for sinks in ([RowsSink(_ListWriter()), RowsSink(_ListWriter())], [type("S", (RowsSink,), {"name": "read"})(None)]):
+        with pytest.raises(ValueError, match="unique"):
+            run_pipeline([], rates, sinks)
+
+
+def test_failed_run_aborts_the_pdf_sink(tmp_path):
+    fitz = pytest.importorskip("fitz")
+    from pdf_export import build_template_base, new_page_from_base
+    from pipeline import PdfSink
+
+    xlsx = _workbook(tmp_path / "trips.xlsx", per_sheet=12)
+    tpl = fitz.open()
+    tpl.new_page()
+    tpl.save(str(tmp_path / "template.pdf"))
+
+    class Broken(RowsSink):
+        def write(self, trips, table):
+            raise RuntimeError("disk full")
+
+    pdf = PdfSink(tmp_path / "template.pdf", tmp_path / "out.pdf", lambda t: build_template_base(t, {}),
+                  lambda out, base, trip, total: new_page_from_base(out, base, 0))
+    with pytest.raises(RuntimeError, match="disk full"):
+        run_pipeline([(str(xlsx), ["August 2025"], False)], load_rates_bundle(RATES_YML),
+                     [pdf, Broken(_ListWriter())], batch_size=4, queue_size=1)
+    assert pdf._out.is_closed and pdf._base.is_closed and pdf._tpl.is_closed
+    assert not (tmp_path / "out.pdf").exists()
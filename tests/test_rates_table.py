@@ -0,0 +1,176 @@
+# tests/test_rates_table.py
+from datetime import date, timedelta
+from pathlib import Path
+
+import pytest
+
+from rates import FxSchedule, RateTable, pick_schedule_by_date, load_rates, pick_fx_rate
+from sk_per_diem import load_sk_rates, pick_sk_schedule
+
+RATES_YML = Path(__file__).resolve().parent.parent / "rates.yml"
+
+
+def test_rate_table_matches_linear_pick():
+    scheds = [
+        FxSchedule(effective_from=date(2025, 1, 1), rate=1.10),
+        FxSchedule(effective_from=date(2024, 6, 1), rate=1.05),
+        FxSchedule(effective_from=date(2025, 7, 15), rate=1.20),
+    ]
+    table = RateTable({"gbp": scheds})
+    assert "GBP" in table
+
+    days = [date(2024, 6, 1) + timedelta(days=i) for i in range(0, 600, 7)]
+    expected = [pick_schedule_by_date(scheds, d) for d in days]
+    assert [table.pick("GBP", d) for d in days] == expected
+    assert table.lookup(["GBP"] * len(days), days) == expected
+
+    with pytest.raises(ValueError):
+        table.pick("GBP", date(2024, 5, 31))
+    with pytest.raises(ValueError):
+        table.pick("CZK", date(2025, 1, 1))
+
+
+def test_loaders_use_compiled_tables():
+    rates = load_rates(RATES_YML)
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 1)) == 0.04136
+
+    sk = load_sk_rates(RATES_YML)
+    assert pick_sk_schedule(sk, date(2025, 3, 31)).effective_from == date(2025, 1, 1)
+    assert pick_sk_schedule(sk, date(2025, 4, 1)).effective_from == date(2025, 4, 1)
+    assert pick_sk_schedule(sk, date(2026, 5, 1)).effective_from == date(2025, 12, 1)
+    with pytest.raises(ValueError):
+        pick_sk_schedule(sk, date(2024, 12, 31))
+
+
+def test_rates_bundle_cached_and_snapshot(tmp_path):
+    from rates_bundle import load_rates_bundle, load_rates_snapshot, save_rates_snapshot
+    from per_diem import compute_foreign_per_diem_for_day
+    from sk_per_diem import compute_sk_per_diem_for_day
+
+    yml = tmp_path / "rates.yml"
+    yml.write_bytes(RATES_YML.read_bytes())
+
+    bundle = load_rates_bundle(yml)
+    assert load_rates_bundle(yml) is bundle
+    with pytest.raises(Exception):
+        bundle.countries["XX"] = None
+
+    # bundle works wherever the load_rates() dict does
+    legacy = load_rates(yml)
+    day = date(2025, 9, 2)
+    assert compute_foreign_per_diem_for_day(bundle, "CZ", day, 7.0) == \
+        compute_foreign_per_diem_for_day(legacy, "CZ", day, 7.0)
+    assert compute_sk_per_diem_for_day(bundle.sk_schedules, day, 13.0) == 13.10
+
+    snap = tmp_path / "rates.pickle"
+    save_rates_snapshot(bundle, snap)
+    restored = load_rates_snapshot(snap)
+    assert restored.fingerprint == bundle.fingerprint
+    assert compute_foreign_per_diem_for_day(restored, "UK", day, 13.0) == \
+        compute_foreign_per_diem_for_day(bundle, "UK", day, 13.0)
+
+    # content change -> new bundle
+    yml.write_text(yml.read_text(encoding="utf-8").replace("daily_base: 600", "daily_base: 700"), encoding="utf-8")
+    changed = load_rates_bundle(yml)
+    assert changed is not bundle
+    assert compute_foreign_per_diem_for_day(changed, "CZ", day, 13.0).original.amount == 700.0
+
+
+ECB_CSV = """Date,USD,CZK,GBP,
+2025-09-05,1.1675,24.420,0.86750,
+2025-09-04,1.1650,24.450,N/A,
+2025-09-03,1.1660,25.000,0.86800,
+"""
+
+
+def test_fx_history_from_ecb_csv(tmp_path):
+    from rates_bundle import load_rates_bundle
+    from per_diem import compute_foreign_per_diem_for_day
+    from per_diem_batch import compute_foreign_per_diem_batch
+
+    (tmp_path / "eurofxref-hist.csv").write_text(ECB_CSV, encoding="utf-8")
+    yml = tmp_path / "rates.yml"
+    yml.write_text(RATES_YML.read_text(encoding="utf-8") + "\nfx_history:\n  ecb_csv: eurofxref-hist.csv\n",
+                   encoding="utf-8")
+    rates = load_rates_bundle(yml)
+    assert (tmp_path / "eurofxref-hist.csv.fxcache").exists()
+
+    # daily fixing, weekend -> previous business day, N/A skipped, before history -> rates.yml
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 3)) == 1 / 25.0
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 7)) == 1 / 24.42
+    assert pick_fx_rate(rates, "GBP", date(2025, 9, 4)) == 1 / 0.868
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 1)) == 0.04136
+
+    days = [date(2025, 9, d) for d in (1, 3, 4, 6)]
+    batch = compute_foreign_per_diem_batch(rates, ["CZ"] * 4, days, [13.0] * 4)
+    assert list(batch.eur) == [compute_foreign_per_diem_for_day(rates, "CZ", d, 13.0).eur.amount for d in days]
+
+    # CSV update -> bundle and binary cache rebuilt
+    (tmp_path / "eurofxref-hist.csv").write_text(ECB_CSV.replace("24.420", "20.0"), encoding="utf-8")
+    reloaded = load_rates_bundle(yml)
+    assert reloaded is not rates and reloaded.fingerprint != rates.fingerprint
+    assert pick_fx_rate(reloaded, "CZK", date(2025, 9, 5)) == 1 / 20.0
+
+
+def test_fx_history_stops_after_its_last_fixing(tmp_path):
+    from rates_bundle import load_rates_bundle
+    from per_diem import compute_foreign_per_diem_for_day
+    from per_diem_batch import compute_foreign_per_diem_batch
+
+    (tmp_path / "eurofxref-hist.csv").write_text(ECB_CSV, encoding="utf-8")
+    yml = tmp_path / "rates.yml"
+    text = RATES_YML.read_text(encoding="utf-8") + "\nfx_history:\n  ecb_csv: eurofxref-hist.csv\n"
+    yml.write_text(text, encoding="utf-8")
+    rates = load_rates_bundle(yml)
+
+    # last fixing Fri 2025-09-05 covers FALLBACK_DAYS more, rates.yml from then on
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 9)) == 1 / 24.42
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 10)) == 0.04136
+    assert pick_fx_rate(rates, "GBP", date(2026, 2, 1)) == 1.15
+
+    days = [date(2025, 9, 1), date(2025, 9, 5), date(2025, 9, 9), date(2025, 9, 10), date(2026, 1, 5)]
+    batch = compute_foreign_per_diem_batch(rates, ["CZ"] * 5, days, [13.0] * 5)
+    assert list(batch.eur) == [compute_foreign_per_diem_for_day(rates, "CZ", d, 13.0).eur.amount for d in days]
+
+    # a rates.yml schedule dated after the last fixing takes over at once
+    yml.write_text(text.replace("  CZK:\n    schedules:\n",
+                                "  CZK:\n    schedules:\n      - effective_from: \"2025-09-08\"\n        rate: 0.05\n"),
+                   encoding="utf-8")
+    rates = load_rates_bundle(yml)
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 7)) == 1 / 24.42
+    assert pick_fx_rate(rates, "CZK", date(2025, 9, 8)) == 0.05
+    batch = compute_foreign_per_diem_batch(rates, ["CZ"] * 5, days, [13.0] * 5)
+    assert list(batch.eur) == [compute_foreign_per_diem_for_day(rates, "CZ", d, 13.0).eur.amount for d in days]
+
+
+def test_snapshot_load_skips_yaml(tmp_path, monkeypatch):
+    import yaml
+    from rates_bundle import clear_rates_cache, load_rates_bundle, save_rates_snapshot
+
+    (tmp_path / "eurofxref-hist.csv").write_text(ECB_CSV, encoding="utf-8")
+    yml = tmp_path / "rates.yml"
+    yml.write_text(RATES_YML.read_text(encoding="utf-8") + "\nfx_history:\n  ecb_csv: eurofxref-hist.csv\n",
+                   encoding="utf-8")
+    snap = tmp_path / "rates.pickle"
+    bundle = load_rates_bundle(yml)
+    save_rates_snapshot(bundle, snap)
+    clear_rates_cache()
+
+    safe_load = yaml.safe_load
+
+    def no_yaml(*args, **kwargs):
+        raise AssertionError("YAML parsed despite a valid snapshot")
+
+    monkeypatch.setattr(yaml, "safe_load", no_yaml)
+    restored = load_rates_bundle(yml, snapshot=snap)
+    assert restored.fingerprint == bundle.fingerprint
+    assert pick_fx_rate(restored, "CZK", date(2025, 9, 5)) == 1 / 24.42
+    assert load_rates_bundle(yml, snapshot=snap) is restored
+
+    # FX history changed -> snapshot stale, rates.yml parsed again
+    monkeypatch.setattr(yaml, "safe_load", safe_load)
+    (tmp_path / "eurofxref-hist.csv").write_text(ECB_CSV.replace("24.420", "20.0"), encoding="utf-8")
+    clear_rates_cache()
+    rebuilt = load_rates_bundle(yml, snapshot=snap)
+    assert rebuilt.fingerprint != bundle.fingerprint
+    assert pick_fx_rate(rebuilt, "CZK", date(2025, 9, 5)) == 1 / 20.0
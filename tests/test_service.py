@@ -0,0 +1,111 @@
+# tests/test_service.py
+import asyncio
+import json
+from pathlib import Path
+
+from service import PricingService
+
+RATES_YML = Path(__file__).resolve().parent.parent / "rates.yml"
+
+TRIP = {"country": "CZ", "start": "2025-09-02T06:00", "end": "2025-09-03T21:00",
+        "border_out": "07:30", "border_in": "19:15", "purpose": "Servis"}
+
+
+async def _request(port, method, path, payload=None, reader_writer=None):
+    reader, writer = reader_writer or await asyncio.open_connection("127.0.0.1", port)
+    body = b"" if payload is None else json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) != b"\r\n":
+        k, _, v = line.decode().partition(":")
+        if k.lower() == "content-length":
+            length = int(v)
+    return status, json.loads(await reader.readexactly(length)), (reader, writer)
+
+
+def test_price_batch_and_reload(tmp_path):
+    from export_all import iter_trip_rows
+    from rates_bundle import load_rates_bundle
+    from service import trip_from_json
+
+    yml = tmp_path / "rates.yml"
+    yml.write_bytes(RATES_YML.read_bytes())
+
+    async def run():
+        svc = PricingService(yml, reload_interval=3600)
+        server = await svc.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            status, one, conn = await _request(port, "POST", "/price", TRIP)
+            assert status == 200
+            # same numbers as the export
+            rows = list(iter_trip_rows(1, trip_from_json(TRIP), load_rates_bundle(yml)))
+            assert [d["eur_amount"] for d in one["days"]] == [r["eur_amount"] for r in rows[:-1]]
+            assert one["total_eur"] == rows[-1]["eur_amount"]
+
+            # keep-alive connection, batch with a per-trip error
+            status, batch, _ = await _request(port, "POST", "/price/batch",
+                                              {"trips": [TRIP, {**TRIP, "country": "XX"}, {"country": "DE"}]},
+                                              reader_writer=conn)
+            assert status == 200
+            assert batch["results"][0] == one
+            assert "error" in batch["results"][1] and "error" in batch["results"][2]
+
+            assert (await _request(port, "GET", "/nope"))[0] == 404
+            assert (await _request(port, "POST", "/price", {"country": "CZ"}))[0] == 400
+
+            # rates.yml change is picked up without a restart
+            yml.write_text(yml.read_text(encoding="utf-8").replace("daily_base: 600", "daily_base: 700"),
+                           encoding="utf-8")
+            assert svc.holder.refresh()
+            _, after, _ = await _request(port, "POST", "/price", TRIP)
+            assert after["total_eur"] > one["total_eur"]
+            status, health, _ = await _request(port, "GET", "/health")
+            assert health["reloads"] == 1
+        finally:
+            conn[1].close()
+            svc.stop()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_slow_pricing_does_not_block_other_clients_and_bad_length():
+    import time as _time
+
+    async def run():
+        svc = PricingService(RATES_YML, reload_interval=3600)
+        handle = svc.handle
+
+        def slow_handle(method, path, body):
+            if path == "/price":
+                _time.sleep(0.5)
+            return handle(method, path, body)
+
+        svc.handle = slow_handle
+        server = await svc.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            slow = asyncio.ensure_future(_request(port, "POST", "/price", TRIP))
+            await asyncio.sleep(0.05)
+            status, _, conn = await _request(port, "GET", "/health")
+            assert status == 200 and not slow.done()
+            conn[1].close()
+            assert (await slow)[0] == 200
+            (await slow)[2][1].close()
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /price HTTP/1.1\r\nContent-Length: abc\r\n\r\n")
+            await writer.drain()
+            assert int((await reader.readline()).split()[1]) == 400
+            assert b"Connection: close" in await reader.read()
+            writer.close()
+        finally:
+            svc.stop()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
@@ -0,0 +1,57 @@
+# tests/test_trip_model.py
+import pickle
+import tracemalloc
+from datetime import date, datetime, time
+
+from trip_model import DayResult, DayTable, Trip, iter_result_rows
+
+
+def test_trip_reads_like_the_old_dict():
+    d = {"country": "CZ", "start_dt": datetime(2025, 9, 2, 6), "end_dt": datetime(2025, 9, 3, 21),
+         "purpose": "Servis", "border_out": time(7, 30), "border_in": time(19, 15), "crossings": None}
+    t = Trip.from_dict(d)
+    assert t == d and dict(t) == d
+    assert t["country"] == "CZ" and t.get("sheet") is None and t.get("purpose", "") == "Servis"
+    assert pickle.loads(pickle.dumps(t)) == t
+    assert not hasattr(t, "__dict__")
+    assert "sheet" not in t and "start" not in t and "country" in t
+
+    tagged = Trip.from_dict({**d, "sheet": "September 2025"})
+    assert tagged["sheet"] == "September 2025" and tagged != t
+
+
+def _days(n):
+    return [DayResult("CZ" if i % 3 else "SK", date(2025, 1, 1 + i % 28), 7.5 + i % 5, 30000 + i, "CZK", 1241 + i)
+            for i in range(n)]
+
+
+def test_day_table_rows_match_per_trip_rows():
+    days = _days(7)
+    table = DayTable()
+    table.add_trip(1, "A", days[:3], sheet="S")
+    table.add_trip(2, "B", [])
+    table.add_trip(3, "C", days[3:], sheet="S")
+
+    expected = []
+    for trip_id, purpose, ds, tags in [(1, "A", days[:3], {"sheet": "S"}), (2, "B", [], {}), (3, "C", days[3:], {"sheet": "S"})]:
+        expected += [{**r, **tags} for r in iter_result_rows(trip_id, purpose, ds)]
+    assert list(table.iter_rows()) == expected
+    assert len(table) == 7 and table.trips == 3
+    assert list(pickle.loads(pickle.dumps(table)).iter_rows()) == expected
+
+
+def test_day_table_is_an_order_of_magnitude_smaller_than_row_dicts():
+    n = 20_000
+    days = _days(n)
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    table = DayTable()
+    table.add_trip(1, "A", days)
+    table_bytes = tracemalloc.get_traced_memory()[0] - base
+    rows = list(iter_result_rows(1, "A", days))
+    rows_bytes = tracemalloc.get_traced_memory()[0] - base - table_bytes
+    tracemalloc.stop()
+
+    assert len(rows) == n + 1
+    assert table_bytes * 10 < rows_bytes
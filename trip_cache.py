@@ -0,0 +1,93 @@
+from __future__ import annotations
+import hashlib
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from import_excel import load_trips
+from instrumentation import timed
+from trip_model import Trip
+
+# Normalized trip tables (output of load_trips) cached as Arrow IPC files keyed by
+# workbook content hash + sheet name. Later runs memory-map the file instead of
+# parsing Excel. Without pyarrow installed the cache is simply bypassed.
+
+CACHE_DIR = ".trip_cache"
+CACHE_VERSION = 3  # bump when the trip dict layout or the cell parsing changes
+
+
+def workbook_digest(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_path(path: str | Path, sheet: str, cache_dir: str | Path = CACHE_DIR) -> Path:
+    sheet_key = hashlib.sha1(sheet.encode("utf-8")).hexdigest()[:12]
+    return Path(cache_dir) / f"v{CACHE_VERSION}-{workbook_digest(path)[:24]}-{sheet_key}.arrow"
+
+
+def _schema(pa):
+    return pa.schema([
+        ("country", pa.string()),
+        ("start_dt", pa.timestamp("us")),
+        ("end_dt", pa.timestamp("us")),
+        ("purpose", pa.string()),
+        ("border_out", pa.time64("us")),
+        ("border_in", pa.time64("us")),
+        # crossing: a bare time (date inferred later) or a pinned datetime
+        ("crossings", pa.list_(pa.struct([
+            ("country", pa.string()),
+            ("time", pa.time64("us")),
+            ("at", pa.timestamp("us")),
+        ]))),
+    ])
+
+
+def _to_rows(trips: List[Dict]) -> List[Dict]:
+    rows = []
+    for t in trips:
+        crossings = t.get("crossings")
+        if crossings is not None:
+            crossings = [
+                {"country": c, "time": None, "at": at} if isinstance(at, datetime) else {"country": c, "time": at, "at": None}
+                for c, at in crossings
+            ]
+        rows.append({**t, "crossings": crossings})
+    return rows
+
+
+def _from_rows(rows: List[Dict]) -> List[Trip]:
+    for r in rows:
+        if r["crossings"] is not None:
+            r["crossings"] = [(c["country"], c["at"] if c["at"] is not None else c["time"]) for c in r["crossings"]]
+    return [Trip.from_dict(r) for r in rows]
+
+
+@timed("import.load_trips_cached")
+def load_trips_cached(path: str, sheet: str, cache_dir: str | Path = CACHE_DIR) -> List[Trip]:
+    """load_trips() with an Arrow IPC cache; a changed workbook gets a new cache key."""
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc
+    except ImportError:
+        return load_trips(path, sheet)
+
+    p = cache_path(path, sheet, cache_dir)
+    if p.exists():
+        with pa.memory_map(str(p)) as src:
+            return _from_rows(pa.ipc.open_file(src).read_all().to_pylist())
+
+    trips = load_trips(path, sheet)
+    table = pa.Table.from_pylist(_to_rows(trips), schema=_schema(pa))
+
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_suffix(f".{os.getpid()}.tmp")
+    with pa.OSFile(str(tmp), "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, p)  # atomic -> concurrent runs never see a half-written cache
+    return trips
@@ -0,0 +1,218 @@
+from __future__ import annotations
+from array import array
+from collections.abc import Mapping
+from datetime import date, datetime, time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Compact containers for trips and computed trip-days.
+# - Trip: one slotted object per trip; still reads like the old trip dict
+#   (t["country"], t.get("purpose"), dict(t), t == {...}) so callers keep working
+# - TripDay / DayResult: slotted per-day values, amounts as integer cents
+# - DayTable: struct-of-arrays store for many priced trip-days (array module
+#   columns, codes interned), iterated back into export rows on demand
+
+
+class Trip(Mapping):
+    __slots__ = ("country", "start_dt", "end_dt", "purpose", "border_out", "border_in", "crossings", "sheet")
+
+    _KEYS = ("country", "start_dt", "end_dt", "purpose", "border_out", "border_in", "crossings")
+    _SLOT_NAMES = frozenset(__slots__)
+
+    def __init__(self, country: str, start_dt: datetime, end_dt: datetime, purpose: str = "",
+                 border_out: Optional[time] = None, border_in: Optional[time] = None,
+                 crossings: Optional[list] = None, sheet: Optional[str] = None):
+        self.country = country
+        self.start_dt = start_dt
+        self.end_dt = end_dt
+        self.purpose = purpose
+        self.border_out = border_out
+        self.border_in = border_in
+        self.crossings = crossings
+        self.sheet = sheet
+
+    @classmethod
+    def from_dict(cls, d: Mapping) -> "Trip":
+        return cls(**{k: d[k] for k in cls.__slots__ if k in d})
+
+    def _keys(self):
+        return self._KEYS if self.sheet is None else self._KEYS + ("sheet",)
+
+    def __getitem__(self, key: str):
+        # "sheet" is a key only when set (trips read from one sheet don't carry it)
+        if key not in self._SLOT_NAMES or (key == "sheet" and self.sheet is None):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def __repr__(self) -> str:
+        return f"Trip({dict(self)!r})"
+
+    def __reduce__(self):
+        return (Trip, tuple(getattr(self, k) for k in self.__slots__))
+
+
+class TripDay:
+    """Hours spent in one country on one calendar day."""
+    __slots__ = ("country", "day", "hours")
+
+    def __init__(self, country: str, day: date, hours: float):
+        self.country = country
+        self.day = day
+        self.hours = hours
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, TripDay) and (self.country, self.day, self.hours) == (other.country, other.day, other.hours)
+
+    def __repr__(self) -> str:
+        return f"TripDay({self.country!r}, {self.day!r}, {self.hours!r})"
+
+
+class DayResult:
+    """Priced trip-day; orig_cents in `currency`, eur_cents in EUR."""
+    __slots__ = ("country", "day", "hours", "orig_cents", "currency", "eur_cents")
+
+    def __init__(self, country: str, day: date, hours: float, orig_cents: int, currency: str, eur_cents: int):
+        self.country = country
+        self.day = day
+        self.hours = hours
+        self.orig_cents = orig_cents
+        self.currency = currency
+        self.eur_cents = eur_cents
+
+    @property
+    def orig_amount(self) -> float:
+        return self.orig_cents / 100
+
+    @property
+    def eur_amount(self) -> float:
+        return self.eur_cents / 100
+
+    def __repr__(self) -> str:
+        return (f"DayResult({self.country!r}, {self.day!r}, {self.hours!r}, "
+                f"{self.orig_cents!r}, {self.currency!r}, {self.eur_cents!r})")
+
+
+def cents(amount: float) -> int:
+    """Amount already rounded to 2 decimals -> exact integer cents."""
+    return int(round(amount * 100))
+
+
+# -----------------------------
+# Export rows
+# -----------------------------
+
+def day_row(trip_id: int, purpose: str, country: str, day: date, hours: float,
+            orig_cents: int, currency: str, eur_cents: int) -> Dict[str, Any]:
+    return {
+        "trip_id": trip_id,
+        "purpose": purpose,
+        "segment_country": country,
+        "day": str(day),
+        "hours": round(hours, 2),
+        "orig_amount": orig_cents / 100,
+        "orig_currency": currency,
+        "eur_amount": eur_cents / 100,
+    }
+
+
+def total_row(trip_id: int, purpose: str, eur_cents: int) -> Dict[str, Any]:
+    return {
+        "trip_id": trip_id,
+        "purpose": purpose,
+        "segment_country": "TOTAL",
+        "day": "",
+        "hours": "",
+        "orig_amount": "",
+        "orig_currency": "",
+        "eur_amount": eur_cents / 100,
+    }
+
+
+def iter_result_rows(trip_id: int, purpose: str, days: Iterable[DayResult]) -> Iterator[Dict[str, Any]]:
+    """Rows of one trip: one per trip-day, then its TOTAL row (sum in cents)."""
+    total = 0
+    for d in days:
+        total += d.eur_cents
+        yield day_row(trip_id, purpose, d.country, d.day, d.hours, d.orig_cents, d.currency, d.eur_cents)
+    yield total_row(trip_id, purpose, total)
+
+
+class DayTable:
+    """
+    Struct-of-arrays store of priced trip-days grouped by trip:
+        table.add_trip(trip_id, purpose, day_results, sheet="September 2025")
+        for row in table.iter_rows(): ...
+    About 40 bytes per trip-day instead of a row dict (~1 kB); pickles as a few
+    byte buffers, which keeps process-pool results cheap.
+    """
+
+    def __init__(self):
+        # per trip
+        self.trip_id = array("q")
+        self.trip_start = array("q")  # offset of the trip's first day
+        self.purposes: List[str] = []
+        self.tags: List[Dict[str, Any]] = []
+        # per trip-day
+        self.country = array("H")     # index into self._codes
+        self.day = array("l")         # date ordinal
+        self.hours = array("d")
+        self.orig_cents = array("q")
+        self.currency = array("H")    # index into self._codes
+        self.eur_cents = array("q")
+        self._codes: List[str] = []
+        self._code_idx: Dict[str, int] = {}
+
+    def _code(self, code: str) -> int:
+        i = self._code_idx.get(code)
+        if i is None:
+            i = self._code_idx[code] = len(self._codes)
+            self._codes.append(code)
+        return i
+
+    def add_trip(self, trip_id: int, purpose: str, days: Iterable[DayResult], **tags) -> None:
+        self.trip_id.append(trip_id)
+        self.trip_start.append(len(self.day))
+        self.purposes.append(purpose)
+        self.tags.append(tags)
+        for d in days:
+            self.country.append(self._code(d.country))
+            self.day.append(d.day.toordinal())
+            self.hours.append(d.hours)
+            self.orig_cents.append(d.orig_cents)
+            self.currency.append(self._code(d.currency))
+            self.eur_cents.append(d.eur_cents)
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @property
+    def trips(self) -> int:
+        return len(self.trip_id)
+
+    def trip_totals(self) -> List[int]:
+        """EUR cents per trip, in trip order (the TOTAL rows' amounts)."""
+        bounds = list(self.trip_start) + [len(self.day)]
+        return [sum(self.eur_cents[bounds[k]:bounds[k + 1]]) for k in range(len(self.trip_id))]
+
+    def iter_rows(self) -> Iterator[Dict[str, Any]]:
+        codes = self._codes
+        n_trips = len(self.trip_id)
+        for k in range(n_trips):
+            lo = self.trip_start[k]
+            hi = self.trip_start[k + 1] if k + 1 < n_trips else len(self.day)
+            trip_id, purpose, tags = self.trip_id[k], self.purposes[k], self.tags[k]
+            total = 0
+            for i in range(lo, hi):
+                total += self.eur_cents[i]
+                row = day_row(trip_id, purpose, codes[self.country[i]], date.fromordinal(self.day[i]),
+                              self.hours[i], self.orig_cents[i], codes[self.currency[i]], self.eur_cents[i])
+                row.update(tags)
+                yield row
+            row = total_row(trip_id, purpose, total)
+            row.update(tags)
+            yield row
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from compute_trip_segments import HOME, crossing_segments
+from import_excel import time_offsets
+
+# Bulk counterpart of split_trip_into_country_segments + iter_days + hours_in_day.
+# Works on a whole trip table with datetime64 arithmetic and repeat/cumsum indexing.
+
+_DAY = np.timedelta64(1, "D").astype("timedelta64[ns]")
+_NAT = np.timedelta64("NaT", "ns")
+
+
+def resolve_border_datetimes_batch(start: np.ndarray, end: np.ndarray, out_off: np.ndarray, in_off: np.ndarray):
+    """
+    Vectorized resolve_border_datetimes: same date inference and bounds check.
+    Returns (b_out, b_in, has_borders); b_out/b_in are NaT where a border time is missing.
+    """
+    has_b = ~np.isnat(out_off) & ~np.isnat(in_off)
+    start_day = start.astype("datetime64[D]").astype("datetime64[ns]")
+
+    b_out = start_day + out_off
+    b_out = np.where(b_out < start, b_out + _DAY, b_out)
+
+    b_in = start_day + in_off
+    # smallest k >= 0 with b_in + k days > b_out
+    behind = (b_out - b_in).astype("int64")
+    k = np.where(b_in > b_out, 0, behind // _DAY.astype("int64") + 1)
+    b_in = b_in + k * _DAY
+
+    ok = (start <= b_out) & (b_out <= end) & (start <= b_in) & (b_in <= end) & (b_out < b_in)
+    if (has_b & ~ok).any():
+        raise ValueError("Border times out of trip bounds")
+    return b_out, b_in, has_b
+
+
+def expand_trips_to_days(trips: pd.DataFrame) -> pd.DataFrame:
+    """
+    trips: start_dt, end_dt, country, optional border_out/border_in (time-of-day cells or
+    timedelta offsets, see import_excel.time_offsets; load_trips_frame gives offsets),
+    optional crossings (see split_trip_into_country_segments) and optional trip_id
+    (defaults to 1..n like the exports).
+    Returns long format (trip_id, segment, country, day, hours) in the same order as
+    the per-trip loops; days with zero hours are dropped (the exports skip them).
+    """
+    n = len(trips)
+    trip_id = trips["trip_id"].to_numpy() if "trip_id" in trips.columns else np.arange(1, n + 1)
+    start = pd.to_datetime(trips["start_dt"]).to_numpy(dtype="datetime64[ns]")
+    end = pd.to_datetime(trips["end_dt"]).to_numpy(dtype="datetime64[ns]")
+    country = trips["country"].to_numpy(dtype=object)
+
+    missing = pd.Series([None] * n, index=trips.index)
+    out_off = time_offsets(trips["border_out"] if "border_out" in trips.columns else missing)
+    in_off = time_offsets(trips["border_in"] if "border_in" in trips.columns else missing)
+    # multi-country itineraries (crossings) replace border_out/border_in
+    crossings = trips["crossings"].to_numpy(dtype=object) if "crossings" in trips.columns else np.full(n, None)
+    multi = np.fromiter((bool(c) for c in crossings), dtype=bool, count=n)
+    out_off = np.where(multi, _NAT, out_off)
+    in_off = np.where(multi, _NAT, in_off)
+    b_out, b_in, has_b = resolve_border_datetimes_batch(start, end, out_off, in_off)
+
+    # --- segments: 3 per split foreign trip (SK, country, SK), else 1; none for multi
+    split = has_b & (country != HOME)
+    n_seg = np.where(multi, 0, np.where(split, 3, 1))
+    seg_trip = np.repeat(np.arange(n), n_seg)
+    seg_pos = np.arange(seg_trip.size) - np.repeat(np.cumsum(n_seg) - n_seg, n_seg)
+    seg_split = split[seg_trip]
+
+    seg_start = np.select(
+        [~seg_split, seg_pos == 0, seg_pos == 1],
+        [start[seg_trip], start[seg_trip], b_out[seg_trip]],
+        default=b_in[seg_trip],
+    )
+    seg_end = np.select(
+        [~seg_split, seg_pos == 0, seg_pos == 1],
+        [end[seg_trip], b_out[seg_trip], b_in[seg_trip]],
+        default=end[seg_trip],
+    )
+    seg_country = np.where(seg_split & (seg_pos != 1), HOME, country[seg_trip]).astype(object)
+
+    if multi.any():
+        # the few multi-country trips go through the scalar sweep, merged back in trip order
+        extra = [
+            (i, pos, c, s, e)
+            for i in np.flatnonzero(multi)
+            for pos, (c, s, e) in enumerate(crossing_segments(
+                pd.Timestamp(start[i]).to_pydatetime(), pd.Timestamp(end[i]).to_pydatetime(), crossings[i]
+            ))
+        ]
+        seg_trip = np.concatenate([seg_trip, np.array([x[0] for x in extra], dtype=seg_trip.dtype)])
+        seg_pos = np.concatenate([seg_pos, np.array([x[1] for x in extra], dtype=seg_pos.dtype)])
+        seg_country = np.concatenate([seg_country, np.array([x[2] for x in extra], dtype=object)])
+        seg_start = np.concatenate([seg_start, np.array([x[3] for x in extra], dtype="datetime64[ns]")])
+        seg_end = np.concatenate([seg_end, np.array([x[4] for x in extra], dtype="datetime64[ns]")])
+        order = np.lexsort((seg_pos, seg_trip))
+        seg_trip, seg_pos, seg_country = seg_trip[order], seg_pos[order], seg_country[order]
+        seg_start, seg_end = seg_start[order], seg_end[order]
+
+    keep = seg_end > seg_start
+    seg_trip, seg_pos = seg_trip[keep], seg_pos[keep]
+    seg_start, seg_end, seg_country = seg_start[keep], seg_end[keep], seg_country[keep]
+
+    # --- calendar days per segment
+    first_day = seg_start.astype("datetime64[D]")
+    n_days = (seg_end.astype("datetime64[D]") - first_day).astype("int64") + 1
+    day_seg = np.repeat(np.arange(seg_start.size), n_days)
+    day_off = np.arange(day_seg.size) - np.repeat(np.cumsum(n_days) - n_days, n_days)
+    day = first_day[day_seg] + day_off.astype("timedelta64[D]")
+
+    day_start = day.astype("datetime64[ns]")
+    s = np.maximum(seg_start[day_seg], day_start)
+    e = np.minimum(seg_end[day_seg], day_start + _DAY)
+    # microseconds / 1e6 / 3600 -> same float as timedelta.total_seconds() / 3600.0
+    us = (e - s).astype("timedelta64[us]").astype("int64")
+    hours = (us / 1e6) / 3600.0
+
+    pos = hours > 0
+    return pd.DataFrame({
+        "trip_id": trip_id[seg_trip[day_seg]][pos],
+        "segment": seg_pos[day_seg][pos],
+        "country": seg_country[day_seg][pos],
+        "day": day[pos],
+        "hours": hours[pos],
+    })